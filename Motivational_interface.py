@@ -1,14 +1,22 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import pickle
-from datetime import datetime
 import logging
+import hashlib
+import io
+import json
 import os
-import matplotlib.pyplot as plt
-import seaborn as sns
-from PIL import Image
-import joblib
+import tempfile
+from datetime import datetime, timedelta
+from predictor_core import FEATURES, get_recommendations, get_risk_level, score_cohort
+from prediction_cache import PredictionCache
+import sensitivity
+import drift_monitor
+import prediction_history
+import prediction_store
+from prediction_log import log_prediction, start_prediction_log
+from metrics import ERRORS, PREDICTIONS, REGISTRY, STAGE_SECONDS
+from tenants import ModelPool, Tenant, list_tenants, tenant_label
 
 
 # Agregar esto al inicio del archivo, después de los imports
@@ -22,14 +30,13 @@ if 'coordinator_count' not in st.session_state:
 # Función para actualizar estadísticas
 def update_stats():
     try:
-        if os.path.exists('logs/app.log'):
-            with open('logs/app.log', 'r', encoding='utf-8') as f:
-                log_content = f.read()
-            
-            st.session_state.student_count = log_content.count('Predicción estudiante - GPA:')
-            st.session_state.coordinator_count = log_content.count('Predicción coordinador - Estudiante:')
-            st.session_state.stats_updated = True
+        with STAGE_SECONDS.time('update_stats'):
+            counts = get_stats_counter(current_tenant().name).refresh()
+        st.session_state.student_count = counts.get(prediction_store.SOURCE_STUDENT, 0)
+        st.session_state.coordinator_count = counts.get(prediction_store.SOURCE_COORDINATOR, 0)
+        st.session_state.stats_updated = True
     except:
+        ERRORS.inc('update_stats')
         st.session_state.student_count = 0
         st.session_state.coordinator_count = 0
 
@@ -58,18 +65,166 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 logger.info("Aplicación iniciada")
 
-# Cargar modelo
+# Rutas del campus (cada campus tiene su modelo, su almacén y sus registros)
 @st.cache_resource
-def load_model():
+def get_tenant(tenant_name):
+    return Tenant(tenant_name)
+
+# Campus de la sesión actual (lo elige main(); None = despliegue de un solo campus)
+def current_tenant():
+    return get_tenant(st.session_state.get('tenant'))
+
+# Inicializar el almacén de predicciones del campus (importa app.log una sola vez)
+@st.cache_resource
+def init_prediction_store(tenant_name):
+    tenant = get_tenant(tenant_name)
+    # app.log es el registro del despliegue original, de un solo campus
+    if tenant_name is None:
+        try:
+            imported = prediction_store.import_log_file('logs/app.log', db_path=tenant.db_path)
+            if imported:
+                logger.info(f"Predicciones importadas desde app.log: {imported}")
+        except Exception as e:
+            logger.error(f"Error importando app.log al almacén de predicciones: {str(e)}")
+    
+    # Historial en columnas binarias para los agregados (se llena una vez desde el almacén)
     try:
-        with open('WeightBestModel.pkl', 'rb') as file:
-            model = joblib.load(file)
-        logger.info("Modelo cargado exitosamente")
-        return model
+        imported = prediction_history.import_store(tenant.db_path, tenant.history_dir)
+        if imported:
+            logger.info(f"Predicciones copiadas al historial en columnas ({tenant.label}): {imported}")
     except Exception as e:
-        logger.error(f"Error cargando modelo: {str(e)}")
+        logger.error(f"Error creando el historial en columnas ({tenant.label}): {str(e)}")
+
+# Registro estructurado de predicciones (JSON Lines + almacén), escrito en segundo plano.
+# Cada campus tiene su propia cola, hilo y archivos: no comparten el lock de un archivo
+@st.cache_resource
+def get_prediction_logger(tenant_name):
+    tenant = get_tenant(tenant_name)
+    event_logger, _ = start_prediction_log(tenant.event_log_path, tenant.db_path, tenant.history_dir)
+    return event_logger
+
+# Contador compartido entre sesiones; cada rerun solo lee las predicciones nuevas
+@st.cache_resource
+def get_stats_counter(tenant_name):
+    return prediction_store.SourceCounter(get_tenant(tenant_name).db_path)
+
+# Pool de modelos por campus con recarga en caliente (un solo vigilante en segundo plano por proceso)
+@st.cache_resource
+def get_model_pool():
+    pool = ModelPool(max_models=16, max_bytes=512 * 1024 * 1024)
+    pool.start_watcher(interval=5.0)
+    return pool
+
+# Cargar modelo del campus (la versión activa de su registro; se carga al primer uso)
+def load_model():
+    engine = get_model_pool().get(current_tenant())
+    if engine is None:
+        ERRORS.inc('model_load')
         st.error("❌ Error al cargar el modelo. Contacte al administrador.")
-        return None
+    return engine
+
+# Monitoreo de deriva: histogramas en streaming por campus, revisados por un hilo cada minuto.
+# En el despliegue de un solo campus se prepara también la línea base del modelo precargado
+@st.cache_resource
+def get_drift_monitors():
+    monitors = drift_monitor.DriftMonitors(min_samples=200)
+    if not monitors.disabled:
+        monitors.start_checker(interval=60.0)
+        if not list_tenants():
+            monitors.get(None, get_model_pool().get(get_tenant(None)))
+    
+    # Se ejecuta en el hilo del exportador: usa el objeto ya construido, no funciones en caché
+    def drift_metrics():
+        values = {}
+        for tenant_name, monitor in list(monitors.monitors.items()):
+            report = monitor.report
+            if report is not None:
+                for feature, result in report['features'].items():
+                    values[(tenant_label(tenant_name), feature)] = result['psi']
+        return values
+    
+    REGISTRY.gauge('gpa_feature_drift_psi', "PSI de la última ventana frente a la línea base de entrenamiento",
+                   ['campus', 'feature'], callback=drift_metrics)
+    return monitors
+
+# Precargar el modelo y el monitoreo de deriva al arrancar el proceso (el modelo solo en el
+# despliegue de un solo campus; con varios campus cada modelo se carga al primer uso)
+if not list_tenants():
+    get_model_pool().get(get_tenant(None))
+get_drift_monitors()
+
+# Cachés de predicciones por campus; cada una se vacía sola cuando cambia la versión del modelo
+@st.cache_resource
+def get_prediction_caches():
+    return {}
+
+def get_prediction_cache():
+    tenant_name = current_tenant().name
+    caches = get_prediction_caches()
+    if tenant_name not in caches:
+        caches.setdefault(tenant_name, PredictionCache(maxsize=4096))
+    return caches[tenant_name]
+
+# Métricas del proceso: estado de las cachés y exportación periódica a logs/metrics.prom
+@st.cache_resource
+def init_metrics():
+    caches = get_prediction_caches()
+    
+    # Se ejecuta en el hilo del exportador: usa el diccionario ya construido, no funciones en caché
+    def cache_metrics():
+        values = {}
+        for tenant_name, cache in list(caches.items()):
+            stats = cache.stats()
+            for stat in ('hits', 'misses', 'size'):
+                values[(tenant_label(tenant_name), stat)] = stats[stat]
+        return values
+    
+    REGISTRY.gauge('gpa_prediction_cache', "Estado de la caché de predicciones", ['campus', 'stat'],
+                   callback=cache_metrics)
+    REGISTRY.start_textfile_exporter(interval=15.0)
+
+init_metrics()
+
+# Sumar la predicción a los histogramas del campus y de la versión del modelo que la hizo
+# (el monitoreo nunca bloquea una predicción)
+def observe_drift(model, input_data, gpa):
+    try:
+        monitor = get_drift_monitors().get(current_tenant().name, model)
+        if monitor is not None:
+            monitor.observe(input_data, gpa)
+    except Exception as e:
+        logger.error(f"Error en monitoreo de deriva: {str(e)}")
+
+# Alerta de deriva para la vista del coordinador (lee el último reporte, no recorre el historial)
+def drift_alert():
+    try:
+        report = get_drift_monitors().report(current_tenant().name)
+    except Exception as e:
+        logger.error(f"Error leyendo el monitoreo de deriva: {str(e)}")
+        return
+    if report is None or not report['level']:
+        return
+    
+    names = drift_monitor.LABELS
+    drifted = [names.get(name, name) for name, result in report['features'].items() if result['level']]
+    checked = datetime.fromtimestamp(report['checked_at']).strftime('%Y-%m-%d %H:%M')
+    message = (f"Deriva {report['drift_level']} en los datos de entrada respecto al entrenamiento: "
+               f"{', '.join(drifted)} (últimas {report['samples']} predicciones, revisado {checked}). "
+               "Verifique que los datos se estén capturando en la misma escala.")
+    if report['level'] >= 2:
+        st.error(f"🚨 {message}")
+    else:
+        st.warning(f"⚠️ {message}")
+    
+    with st.expander("Detalle de la deriva por variable"):
+        rows = [{
+            'Variable': names.get(name, name),
+            'PSI': round(result['psi'], 3),
+            'KS': round(result['ks'], 3),
+            'KS significativo': "Sí" if result['ks_significant'] else "No",
+            'Deriva': drift_monitor.DRIFT_LEVELS[result['level']],
+        } for name, result in report['features'].items()]
+        st.dataframe(pd.DataFrame(rows), hide_index=True, width='stretch')
 
 # Cargar frases motivacionales
 def get_motivational_quotes(gpa):
@@ -113,80 +268,57 @@ def get_motivational_quotes(gpa):
     else:
         return np.random.choice(quotes["excellent"])
 
-# Obtener recomendaciones según GPA
-def get_recommendations(gpa, student_data):
-    recommendations = []
-    
-    if gpa < 2.0:  # Alto riesgo
-        recommendations.append("🔴 **Intervención urgente necesaria**")
-        recommendations.append("• Programa de tutorías intensivas (3+ sesiones semanales)")
-        recommendations.append("• Reunión con el coordinador académico esta semana")
-        recommendations.append("• Revisión del plan de estudio y técnicas de aprendizaje")
-        recommendations.append("• Evaluación de posibles problemas externos que afecten el rendimiento")
-        
-        if student_data['StudyTimeWeekly'] < 10:
-            recommendations.append("• Incrementar tiempo de estudio a mínimo 15 horas semanales")
-        if student_data['Absences'] > 10:
-            recommendations.append("• Control de asistencia y plan para reducir faltas")
-        if student_data['Tutoring'] == 0:
-            recommendations.append("• Inscribirse inmediatamente en el programa de tutorías")
-            
-    elif gpa < 3.0:  # Riesgo moderado
-        recommendations.append("🟡 **Intervención preventiva recomendada**")
-        recommendations.append("• Participación en tutorías (2 sesiones semanales)")
-        recommendations.append("• Talleres de técnicas de estudio y gestión del tiempo")
-        recommendations.append("• Revisión de materias con mayor dificultad")
-        
-        if student_data['StudyTimeWeekly'] < 15:
-            recommendations.append("• Aumentar tiempo de estudio a 15-20 horas semanales")
-        if student_data['Extracurricular'] == 0 and student_data['Sports'] == 0 and student_data['Music'] == 0 and student_data['Volunteering'] == 0:
-            recommendations.append("• Considerar participar en alguna actividad extracurricular para mejorar el equilibrio")
-            
-    elif gpa < 3.7:  # Bajo riesgo
-        recommendations.append("🟢 **Rendimiento satisfactorio**")
-        recommendations.append("• Mantener buenos hábitos de estudio")
-        recommendations.append("• Identificar áreas de mejora para alcanzar excelencia")
-        recommendations.append("• Considerar mentoría para estudiantes con mayor dificultad")
-        
-        if student_data['StudyTimeWeekly'] > 25:
-            recommendations.append("• Evaluar técnicas de estudio para mejorar eficiencia")
-            
-    else:  # Excelente
-        recommendations.append("✅ **Rendimiento sobresaliente**")
-        recommendations.append("• Considerar programas de honores o investigación")
-        recommendations.append("• Mentoría para otros estudiantes")
-        recommendations.append("• Explorar oportunidades de liderazgo académico")
-        recommendations.append("• Participar en conferencias o competencias académicas")
-    
-    return recommendations
+# Plantilla SVG del indicador de GPA; por predicción solo cambian el ancho y el color de la barra
+GAUGE_LEFT, GAUGE_WIDTH = 20, 560
 
-# Determinar nivel de riesgo
-def get_risk_level(gpa):
-    if gpa < 2.0:
-        return "🔴 ALTO RIESGO", 4
-    elif gpa < 3.0:
-        return "🟡 RIESGO MODERADO", 3
-    elif gpa < 3.7:
-        return "🟢 BAJO RIESGO", 2
-    else:
-        return "✅ EXCELENTE", 1
+def _gauge_x(value):
+    return GAUGE_LEFT + GAUGE_WIDTH * value / 4.0
 
-# Función para predecir GPA
+def _build_gauge_template():
+    thresholds = "".join(
+        f'<line x1="{_gauge_x(value):.1f}" y1="30" x2="{_gauge_x(value):.1f}" y2="90" '
+        f'stroke="{color}" stroke-dasharray="6 4" stroke-opacity="0.5"/>'
+        for value, color in [(2.0, 'red'), (3.0, 'orange'), (3.7, 'green')]
+    )
+    ticks = "".join(
+        f'<text x="{_gauge_x(value):.1f}" y="108" text-anchor="middle" font-size="12">{value:.1f}</text>'
+        for value in [0.0, 0.5, 1.0, 1.5, 2.0, 2.5, 3.0, 3.5, 4.0]
+    )
+    return (
+        '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 600 135" width="100%" role="img" '
+        'aria-label="GPA {gpa:.2f} de 4.0" font-family="sans-serif">'
+        '<text x="300" y="18" text-anchor="middle" font-size="15">Tu GPA en escala de 4.0</text>'
+        f'<rect x="{GAUGE_LEFT}" y="30" width="{GAUGE_WIDTH}" height="60" fill="#f0f2f6" stroke="#999"/>'
+        f'<rect x="{GAUGE_LEFT}" y="38" width="{{width:.1f}}" height="44" fill="{{color}}"/>'
+        f'{thresholds}{ticks}'
+        '<text x="300" y="128" text-anchor="middle" font-size="13">GPA</text>'
+        '</svg>'
+    )
+
+GAUGE_TEMPLATE = _build_gauge_template()
+
+def render_gpa_gauge(gpa):
+    color = 'red' if gpa < 2.0 else 'orange' if gpa < 3.0 else 'green' if gpa < 3.7 else 'blue'
+    width = GAUGE_WIDTH * min(max(gpa, 0.0), 4.0) / 4.0
+    return GAUGE_TEMPLATE.format(gpa=gpa, width=width, color=color)
+
+# Función para predecir GPA; devuelve (gpa, versión del modelo usado)
 def predict_gpa(input_data):
+    # Se toma una sola referencia al modelo: una recarga en curso no afecta esta predicción
     model = load_model()
     if model is None:
-        return None
+        return None, None
     
     try:
-        # Asegurar el orden correcto de las características
-        features = ['Age', 'StudyTimeWeekly', 'Absences', 'Tutoring', 
-                   'Extracurricular', 'Sports', 'Music', 'Volunteering']
-        input_df = pd.DataFrame([input_data], columns=features)
-        prediction = model.predict(input_df)
-        return prediction[0]
+        # input_data ya viene en el orden de FEATURES
+        with STAGE_SECONDS.time('predict'):
+            gpa = get_prediction_cache().predict(model, input_data)
+        observe_drift(model, input_data, gpa)
+        return gpa, model.version
     except Exception as e:
+        ERRORS.inc('predict')
         logger.error(f"Error en predicción: {str(e)}")
-        return None
+        return None, None
 
 # Interfaz para estudiantes
 def student_interface():
@@ -226,18 +358,25 @@ def student_interface():
         
         # Realizar predicción
         with st.spinner("Analizando tu información..."):
-            gpa = predict_gpa(input_data)
+            gpa, model_version = predict_gpa(input_data)
         
         if gpa is not None:
+            # Mostrar GPA y nivel de riesgo
+            risk_level, risk_code = get_risk_level(gpa)
+            
             # Registrar la predicción
-            logger.info(f"Predicción estudiante - GPA: {gpa:.2f}, Datos: {student_data}")
+            PREDICTIONS.inc(prediction_store.SOURCE_STUDENT, risk_code)
+            try:
+                with STAGE_SECONDS.time('log_write'):
+                    log_prediction(get_prediction_logger(current_tenant().name), prediction_store.SOURCE_STUDENT, gpa, risk_code,
+                                   student_data, model_version=model_version)
+            except Exception as e:
+                ERRORS.inc('log_write')
+                logger.error(f"Error guardando registro: {str(e)}")
             
             # Mostrar resultados
             st.success("¡Análisis completado!")
             
-            # Mostrar GPA y nivel de riesgo
-            risk_level, risk_code = get_risk_level(gpa)
-            
             col1, col2 = st.columns(2)
             
             with col1:
@@ -246,16 +385,9 @@ def student_interface():
             
             with col2:
                 # Visualización simple del GPA
-                fig, ax = plt.subplots(figsize=(8, 2))
-                ax.barh([0], [gpa], color=['red' if gpa < 2.0 else 'orange' if gpa < 3.0 else 'green' if gpa < 3.7 else 'blue'])
-                ax.set_xlim(0, 4.0)
-                ax.set_xlabel('GPA')
-                ax.set_yticks([])
-                ax.axvline(x=2.0, color='red', linestyle='--', alpha=0.5)
-                ax.axvline(x=3.0, color='orange', linestyle='--', alpha=0.5)
-                ax.axvline(x=3.7, color='green', linestyle='--', alpha=0.5)
-                ax.set_title('Tu GPA en escala de 4.0')
-                st.pyplot(fig)
+                with STAGE_SECONDS.time('render'):
+                    gauge = render_gpa_gauge(gpa)
+                st.markdown(gauge, unsafe_allow_html=True)
             
             # Mostrar frase motivacional
             quote = get_motivational_quotes(gpa)
@@ -267,27 +399,6 @@ def student_interface():
             for rec in recommendations:
                 st.write(rec)
             
-            # Guardar en registro de estudiantes (simulado)
-            try:
-                student_log = {
-                    'timestamp': datetime.now(),
-                    'age': age,
-                    'study_time': study_time,
-                    'absences': absences,
-                    'tutoring': tutoring,
-                    'extracurricular': extracurricular,
-                    'sports': sports,
-                    'music': music,
-                    'volunteering': volunteering,
-                    'gpa_predicted': gpa,
-                    'risk_level': risk_code
-                }
-                
-                # Aquí iría el código para guardar en base de datos
-                # Por ahora solo log
-                logger.info(f"Registro estudiante guardado: {student_log}")
-            except Exception as e:
-                logger.error(f"Error guardando registro: {str(e)}")
         else:
             st.error("Error al calcular la predicción. Intenta nuevamente.")
 
@@ -329,17 +440,24 @@ def coordinator_manual_input():
         }
         
         with st.spinner("Analizando información del estudiante..."):
-            gpa = predict_gpa(input_data)
+            gpa, model_version = predict_gpa(input_data)
         
         if gpa is not None:
+            risk_level, risk_code = get_risk_level(gpa)
+            
             # Registrar la predicción
-            logger.info(f"Predicción coordinador - Estudiante: {student_id}, GPA: {gpa:.2f}")
+            PREDICTIONS.inc(prediction_store.SOURCE_COORDINATOR, risk_code)
+            try:
+                with STAGE_SECONDS.time('log_write'):
+                    log_prediction(get_prediction_logger(current_tenant().name), prediction_store.SOURCE_COORDINATOR, gpa, risk_code,
+                                   student_data, student_id=student_id, model_version=model_version)
+            except Exception as e:
+                ERRORS.inc('log_write')
+                logger.error(f"Error guardando registro coordinador: {str(e)}")
             
             # Mostrar resultados
             st.success("Análisis completado")
             
-            risk_level, risk_code = get_risk_level(gpa)
-            
             col1, col2, col3 = st.columns(3)
             
             with col1:
@@ -357,77 +475,234 @@ def coordinator_manual_input():
             for rec in recommendations:
                 st.write(rec)
             
-            # Guardar en registro de coordinadores
-            try:
-                coord_log = {
-                    'timestamp': datetime.now(),
-                    'coordinator_action': 'manual_analysis',
-                    'student_id': student_id,
-                    'gpa_predicted': gpa,
-                    'risk_level': risk_code
-                }
-                logger.info(f"Registro coordinador guardado: {coord_log}")
-            except Exception as e:
-                logger.error(f"Error guardando registro coordinador: {str(e)}")
+            # Guardar el estudiante para el análisis de sensibilidad (sobrevive a los reruns)
+            st.session_state.whatif_student = {'input_data': input_data, 'risk_code': risk_code}
+            
         else:
             st.error("Error al calcular la predicción. Intenta nuevamente.")
+    
+    if st.session_state.get('whatif_student'):
+        whatif_panel(st.session_state.whatif_student['input_data'], st.session_state.whatif_student['risk_code'])
+
+# Panel "¿qué pasaría si...?": rejilla horas de estudio x ausencias x tutorías en una sola predicción
+def whatif_panel(input_data, risk_code):
+    st.subheader("🔬 ¿Qué pasaría si...? - Análisis de sensibilidad")
+    
+    model = load_model()
+    if model is None:
+        return
+    
+    try:
+        with STAGE_SECONDS.time('whatif'):
+            gpa_grid = sensitivity.counterfactual_grid(model, input_data)
+            intervention = sensitivity.cheapest_intervention(input_data, gpa_grid, risk_code)
+    except Exception as e:
+        ERRORS.inc('whatif')
+        st.error("Error al calcular el análisis de sensibilidad.")
+        logger.error(f"Error en análisis de sensibilidad: {str(e)}")
+        return
+    
+    age, study_time, absences, tutoring = input_data[:4]
+    t = sensitivity.nearest_index(sensitivity.TUTORING, tutoring)
+    s = sensitivity.nearest_index(sensitivity.STUDY_TIMES, study_time)
+    a = sensitivity.nearest_index(sensitivity.ABSENCES, absences)
+    current_gpa = gpa_grid[t, s, a]
+    
+    # Efecto de cambios puntuales sobre el GPA actual
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        fewer = sensitivity.nearest_index(sensitivity.ABSENCES, max(absences - 5, 0))
+        st.metric("5 ausencias menos", f"{gpa_grid[t, s, fewer]:.2f}", f"{gpa_grid[t, s, fewer] - current_gpa:+.2f}")
+    with col2:
+        more = sensitivity.nearest_index(sensitivity.STUDY_TIMES, min(study_time + 10, 40.0))
+        st.metric("10 h más de estudio", f"{gpa_grid[t, more, a]:.2f}", f"{gpa_grid[t, more, a] - current_gpa:+.2f}")
+    with col3:
+        other = 1 - t
+        label = "Sin tutorías" if tutoring else "Con tutorías"
+        st.metric(label, f"{gpa_grid[other, s, a]:.2f}", f"{gpa_grid[other, s, a] - current_gpa:+.2f}")
+    
+    # Intervención más barata que cambia el nivel de riesgo
+    if risk_code == 1:
+        st.success("El estudiante ya está en el nivel más alto; no se requiere intervención.")
+    elif intervention is None:
+        st.warning("Ninguna combinación de estudio, ausencias y tutorías cambia su nivel de riesgo.")
+    else:
+        changes = []
+        if intervention['StudyTimeWeekly'] > study_time:
+            changes.append(f"estudiar {intervention['StudyTimeWeekly']:.1f} h/semana (hoy {study_time:.1f})")
+        if intervention['Absences'] < absences:
+            changes.append(f"bajar a {intervention['Absences']} ausencias (hoy {absences})")
+        if intervention['Tutoring'] > tutoring:
+            changes.append("inscribirse en tutorías")
+        st.info(f"💡 **Intervención más económica:** {', '.join(changes)} → GPA {intervention['gpa']:.2f} "
+                f"({intervention['risk_level']})")
+    
+    # Superficie de respuesta: GPA por horas de estudio y ausencias
+    surface_tutoring = int(st.radio("Superficie con tutorías", ["No", "Sí"], index=t, horizontal=True) == "Sí")
+    render_whatif_surface(gpa_grid, surface_tutoring, (study_time, absences) if surface_tutoring == tutoring else None,
+                          intervention if intervention and intervention['Tutoring'] == surface_tutoring else None)
+
+def render_whatif_surface(gpa_grid, tutoring, current, intervention):
+    import altair as alt
+    
+    t = sensitivity.nearest_index(sensitivity.TUTORING, tutoring)
+    study, absences = np.meshgrid(sensitivity.STUDY_TIMES, sensitivity.ABSENCES, indexing='ij')
+    surface = pd.DataFrame({
+        'Horas de estudio': study.ravel(),
+        'Ausencias': absences.ravel(),
+        'GPA': gpa_grid[t].ravel().round(2),
+    })
+    heatmap = alt.Chart(surface).mark_rect().encode(
+        x=alt.X('Ausencias:O'),
+        y=alt.Y('Horas de estudio:O', sort='descending', axis=alt.Axis(values=list(range(0, 41, 5)))),
+        color=alt.Color('GPA:Q', scale=alt.Scale(scheme='redyellowgreen', domain=[0, 4])),
+        tooltip=['Horas de estudio', 'Ausencias', 'GPA'],
+    )
+    
+    points = []
+    if current is not None:
+        points.append({'Horas de estudio': current[0], 'Ausencias': current[1], 'Punto': 'Actual'})
+    if intervention is not None:
+        points.append({'Horas de estudio': intervention['StudyTimeWeekly'], 'Ausencias': intervention['Absences'],
+                       'Punto': 'Intervención'})
+    chart = heatmap
+    if points:
+        markers = alt.Chart(pd.DataFrame(points)).mark_point(size=120, filled=True, color='black').encode(
+            x='Ausencias:O', y=alt.Y('Horas de estudio:O', sort='descending'),
+            shape=alt.Shape('Punto:N', legend=alt.Legend(title=None)),
+        )
+        chart = heatmap + markers
+    st.altair_chart(chart.properties(height=420), width='stretch')
+
+# Interfaz para coordinadores - Opción 3: Evaluar una cohorte completa desde CSV
+# Resultado del lote por contenido del archivo, campus y versión del modelo: los reruns
+# (filtros, descargas) reutilizan el cálculo; un modelo nuevo vuelve a evaluar la cohorte
+@st.cache_data(max_entries=8, show_spinner=False)
+def score_upload(content_hash, tenant_name, model_version, _file_bytes, _model):
+    cohort_df = pd.read_csv(io.BytesIO(_file_bytes))
+    with STAGE_SECONDS.time('batch_scoring'):
+        scored_df = score_cohort(cohort_df, _model)
+    return scored_df, scored_df.to_csv(index=False, encoding='utf-8')
+
+def coordinator_batch_scoring():
+    st.header("👨‍🏫 Vista Coordinador - Evaluación por Lote")
+    st.info("Sube un CSV con el formato de Student_performance_data.csv para predecir el GPA de toda la cohorte.")
+    st.caption(f"Columnas requeridas: {', '.join(FEATURES)}")
+    
+    uploaded_file = st.file_uploader("Archivo CSV de la cohorte", type=["csv"])
+    if uploaded_file is None:
+        return
+    
+    model = load_model()
+    if model is None:
+        return
+    
+    file_bytes = uploaded_file.getvalue()
+    content_hash = hashlib.sha256(file_bytes).hexdigest()
+    try:
+        with st.spinner("Analizando la cohorte..."):
+            scored_df, scored_csv = score_upload(content_hash, current_tenant().name, model.version,
+                                                 file_bytes, model)
+    except ValueError as e:
+        ERRORS.inc('batch_scoring')
+        st.error(f"❌ El archivo no tiene el formato esperado: {str(e)}")
+        return
+    except Exception as e:
+        ERRORS.inc('batch_scoring')
+        st.error("Error al calcular las predicciones del lote. Intenta nuevamente.")
+        logger.error(f"Error en predicción por lote: {str(e)}")
+        return
+    
+    logger.info(f"Predicción lote - Estudiantes: {len(scored_df)}, Archivo: {uploaded_file.name}")
+    st.success(f"Análisis completado: {len(scored_df)} estudiantes")
+    
+    # Resumen por nivel de riesgo
+    risk_counts = scored_df['CodigoRiesgo'].value_counts()
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Alto Riesgo", int(risk_counts.get(4, 0)))
+    with col2:
+        st.metric("Riesgo Moderado", int(risk_counts.get(3, 0)))
+    with col3:
+        st.metric("Bajo Riesgo", int(risk_counts.get(2, 0)))
+    with col4:
+        st.metric("GPA Promedio", f"{scored_df['GPA_Predicho'].mean():.2f}")
+    
+    st.dataframe(scored_df.head(100), width='stretch')
+    
+    st.download_button(
+        label="⬇️ Descargar resultados CSV",
+        data=scored_csv,
+        file_name="cohorte_evaluada.csv",
+        mime="text/csv"
+    )
 
-# Interfaz para coordinadores - Opción 2: Ver estudiantes en riesgo
 # Interfaz para coordinadores - Opción 2: Ver estudiantes en riesgo
 def coordinator_risk_list():
     st.header("👨‍🏫 Vista Coordinador - Lista de Estudiantes en Riesgo")
     st.info("Visualiza los estudiantes identificados con mayor necesidad de intervención.")
     
-    # En una implementación real, esto vendría de una base de datos
-    # Por ahora simulamos algunos datos basados en registros del log
+    # Filtros: se aplican en la consulta al almacén, no en memoria
+    risk_options = {4: "🔴 Alto riesgo", 3: "🟡 Riesgo moderado", 2: "🟢 Bajo riesgo", 1: "✅ Excelente"}
+    with st.expander("🔎 Filtros", expanded=False):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            risk_codes = st.multiselect("Nivel de riesgo", options=list(risk_options), default=[4, 3],
+                                        format_func=risk_options.get)
+        with col2:
+            gpa_range = st.slider("Rango de GPA", 0.0, 4.0, (0.0, 4.0), 0.1)
+        with col3:
+            date_range = st.date_input("Rango de fechas", value=(), format="YYYY-MM-DD")
+    
+    filters = {
+        'source': prediction_store.SOURCE_STUDENT,
+        'risk_codes': risk_codes,
+        # Los extremos del slider no acotan (hay predicciones fuera de 0-4)
+        'min_gpa': gpa_range[0] if gpa_range[0] > 0.0 else None,
+        'max_gpa': gpa_range[1] if gpa_range[1] < 4.0 else None,
+        'start': datetime.combine(date_range[0], datetime.min.time()) if len(date_range) >= 1 else None,
+        'end': datetime.combine(date_range[-1], datetime.min.time()) + timedelta(days=1) if len(date_range) >= 1 else None,
+    }
     
+    tenant = current_tenant()
     try:
-        # Leer el archivo de log con encoding UTF-8
-        with open('logs/app.log', 'r', encoding='utf-8') as f:
-            log_lines = f.readlines()
-        
-        student_entries = []
-        for line in log_lines:
-            if 'Predicción estudiante - GPA:' in line:
-                try:
-                    # Extraer GPA usando un método más robusto
-                    gpa_match = line.split('GPA: ')[1].split(',')[0].strip()
-                    gpa = float(gpa_match)
-                    
-                    # Extraer datos del estudiante
-                    if 'Datos:' in line:
-                        data_part = line.split('Datos:')[1].strip()
-                        # Solo considerar estudiantes en riesgo
-                        if gpa < 3.0:
-                            student_entries.append({
-                                'GPA': gpa, 
-                                'Datos': data_part,
-                                'Línea': line.strip()  # Para debugging
-                            })
-                except (ValueError, IndexError) as e:
-                    logger.warning(f"Error parsing line: {line.strip()} - {e}")
-                    continue
+        # Conteos por nivel y GPA promedio: recorrido de las columnas del historial, sin SQL.
+        # Solo si el historial tiene las mismas filas que el almacén que sirve las páginas; si no
+        # (importación pendiente o escritura en curso) el resumen sale también de SQLite
+        with STAGE_SECONDS.time('risk_summary'):
+            store_rows = sum(get_stats_counter(tenant.name).refresh().values())
+            if prediction_history.history_rows(tenant.history_dir) == store_rows:
+                summary = prediction_history.risk_summary(tenant.history_dir, **filters)
+            else:
+                summary = prediction_store.risk_summary(db_path=tenant.db_path, **filters)
         
-        if student_entries:
-            # Ordenar por GPA (menor primero)
-            student_entries.sort(key=lambda x: x['GPA'])
+        if summary['total']:
+            # Paginación en el servidor: solo se consulta la página visible
+            col1, col2 = st.columns(2)
+            with col1:
+                page_size = st.selectbox("Estudiantes por página", [15, 50, 100])
+            total_pages = (summary['total'] - 1) // page_size + 1
+            with col2:
+                page = st.number_input("Página", min_value=1, max_value=total_pages, value=1, step=1)
+            offset = (page - 1) * page_size
+            with STAGE_SECONDS.time('risk_page'):
+                student_entries = prediction_store.fetch_risk_students(limit=page_size, offset=offset,
+                                                                       db_path=tenant.db_path, **filters)
             
-            st.subheader(f"🎯 Estudiantes identificados con riesgo académico: {len(student_entries)}")
+            st.subheader(f"🎯 Estudiantes identificados con riesgo académico: {summary['total']}")
             
             # Mostrar resumen estadístico
             col1, col2, col3 = st.columns(3)
             with col1:
-                high_risk = sum(1 for entry in student_entries if entry['GPA'] < 2.0)
-                st.metric("Alto Riesgo", high_risk)
+                st.metric("Alto Riesgo", summary['high_risk'])
             with col2:
-                medium_risk = sum(1 for entry in student_entries if 2.0 <= entry['GPA'] < 3.0)
-                st.metric("Riesgo Moderado", medium_risk)
+                st.metric("Riesgo Moderado", summary['medium_risk'])
             with col3:
-                avg_gpa = sum(entry['GPA'] for entry in student_entries) / len(student_entries)
-                st.metric("GPA Promedio", f"{avg_gpa:.2f}")
+                st.metric("GPA Promedio", f"{summary['avg_gpa']:.2f}")
             
             # Mostrar detalles de cada estudiante
-            for i, entry in enumerate(student_entries[:15]):  # Mostrar máximo 15
+            st.caption(f"Página {page} de {total_pages}")
+            for i, entry in enumerate(student_entries, start=offset):
                 risk_level, risk_code = get_risk_level(entry['GPA'])
                 risk_color = "🔴" if risk_code == 4 else "🟡" if risk_code == 3 else "🟢"
                 
@@ -436,7 +711,7 @@ def coordinator_risk_list():
                     
                     with col1:
                         st.write("**📊 Información del Estudiante:**")
-                        st.code(entry['Datos'], language='json')
+                        st.code(json.dumps(entry['Datos'], ensure_ascii=False), language='json')
                     
                     with col2:
                         st.write("**📋 Recomendaciones:**")
@@ -459,20 +734,20 @@ def coordinator_risk_list():
                         if st.button(f"📞 Contactar Estudiante {i+1}", key=f"contact_{i}"):
                             st.success(f"Acción de contacto iniciada para estudiante {i+1}")
             
-            # Opción para exportar la lista
-            if st.button("📤 Exportar Lista de Riesgo"):
-                # Crear DataFrame para exportación
-                df_export = pd.DataFrame(student_entries)
-                df_export = df_export[['GPA', 'Datos']]  # Solo columnas relevantes
-                
-                # Convertir a CSV
-                csv = df_export.to_csv(index=False, encoding='utf-8')
-                st.download_button(
-                    label="⬇️ Descargar CSV",
-                    data=csv,
-                    file_name="estudiantes_riesgo.csv",
-                    mime="text/csv"
-                )
+            # Opción para exportar la lista (se genera al descargar, por bloques de filas)
+            def export_risk_list():
+                export_file = tempfile.TemporaryFile()
+                for chunk in prediction_store.iter_risk_csv(db_path=tenant.db_path, **filters):
+                    export_file.write(chunk.encode('utf-8'))
+                export_file.seek(0)
+                return export_file
+            
+            st.download_button(
+                label="📤 Exportar Lista de Riesgo (CSV)",
+                data=export_risk_list,
+                file_name="estudiantes_riesgo.csv",
+                mime="text/csv"
+            )
                 
         else:
             st.success("✅ No se encontraron estudiantes en riesgo en los registros actuales.")
@@ -483,36 +758,52 @@ def coordinator_risk_list():
             - Los registros pueden estar en un formato diferente
             """)
             
-    except FileNotFoundError:
-        st.warning("📝 No se encontró el archivo de registros. Realiza algunas predicciones primero.")
-        st.info("La lista de estudiantes en riesgo se generará automáticamente una vez que haya predicciones.")
-        
     except Exception as e:
+        ERRORS.inc('risk_list')
         st.error(f"❌ Error al procesar los registros: {str(e)}")
         logger.error(f"Error procesando lista de riesgo: {str(e)}")
         
         # Información de debugging
         with st.expander("🔧 Información de Debugging"):
             st.write("**Error details:**", str(e))
-            st.write("**Solución:** Asegúrate de que el archivo logs/app.log existe y tiene el formato correcto.")
+            st.write(f"**Solución:** Asegúrate de que el archivo {tenant.db_path} es accesible.")
             
             # Intentar listar archivos en directorio logs
             try:
-                if os.path.exists('logs'):
-                    files = os.listdir('logs')
+                if os.path.exists(tenant.logs_dir):
+                    files = os.listdir(tenant.logs_dir)
                     st.write("**Archivos en directorio logs:**", files)
                 else:
                     st.write("El directorio 'logs' no existe")
             except:
                 st.write("No se pudo acceder al directorio logs")
 # Interfaz principal
+# Elegir el campus de la sesión: ?campus=<nombre> en la URL o selector en la barra lateral
+def select_tenant():
+    tenants = list_tenants()
+    requested = st.query_params.get('campus')
+    if requested is not None:
+        if requested not in tenants:
+            st.error(f"❌ Campus no configurado: {requested}")
+            st.stop()
+        tenant_name = requested
+    elif tenants:
+        tenant_name = st.sidebar.selectbox("Campus:", tenants)
+    else:
+        tenant_name = None
+    
+    st.session_state.tenant = tenant_name
+    init_prediction_store(tenant_name)
+    return current_tenant()
+
 def main():
+    # Sidebar con selección de campus y de modo
+    st.sidebar.title("🎓 Predictor de Rendimiento Académico")
+    tenant = select_tenant()
+    
     # Actualizar estadísticas al iniciar
     update_stats()
     
-    # Sidebar con selección de modo
-    st.sidebar.title("🎓 Predictor de Rendimiento Académico")
-    
     app_mode = st.sidebar.radio("Selecciona tu modo:",
                                 ["Estudiante", "Coordinador Académico"])
     
@@ -532,15 +823,64 @@ def main():
         update_stats()
         st.sidebar.success("Estadísticas actualizadas")
     
+    # Panel de administración: estado de la caché de predicciones
+    with st.sidebar.expander("⚙️ Administración"):
+        cache_stats = get_prediction_cache().stats()
+        st.write(f"Aciertos de caché: **{cache_stats['hits']}**")
+        st.write(f"Fallos de caché: **{cache_stats['misses']}**")
+        st.write(f"Tasa de aciertos: **{cache_stats['hit_rate']:.1%}**")
+        st.write(f"Entradas en caché: **{cache_stats['size']}**")
+        if cache_stats['precomputed']:
+            st.caption("Rejilla completa de entradas precalculada")
+        elif st.button("Precalcular rejilla de entradas"):
+            model = load_model()
+            if model is not None:
+                get_prediction_cache().precompute(model)
+                st.success("Rejilla precalculada")
+        
+        # Tiempos por etapa (media y p95 aproximado) y contadores del proceso
+        st.write("**Tiempos por etapa:**")
+        stage_rows = []
+        for (stage,) in STAGE_SECONDS.series():
+            summary = STAGE_SECONDS.summary(stage)
+            stage_rows.append({
+                'Etapa': stage,
+                'Llamadas': summary['count'],
+                'Media (ms)': round(summary['mean'] * 1000, 3),
+                'p95 (ms) ≤': summary['quantile'] * 1000,
+            })
+        if stage_rows:
+            st.dataframe(pd.DataFrame(stage_rows), hide_index=True, width='stretch')
+        risk_names = {4: "Alto", 3: "Moderado", 2: "Bajo", 1: "Excelente"}
+        for code, name in risk_names.items():
+            total = sum(PREDICTIONS.get(source, code)
+                        for source in (prediction_store.SOURCE_STUDENT, prediction_store.SOURCE_COORDINATOR))
+            st.write(f"Predicciones riesgo {name}: **{total}**")
+        st.write(f"Errores: **{ERRORS.total()}**")
+        st.download_button("Descargar métricas (Prometheus)", data=REGISTRY.render,
+                           file_name="metrics.prom", mime="text/plain")
+        
+        # Modelos por campus en memoria
+        pool_stats = get_model_pool().stats()
+        st.write(f"Campus actual: **{tenant.label}**")
+        st.write(f"Modelos en memoria: **{', '.join(pool_stats['resident']) or '—'}** "
+                 f"({pool_stats['bytes'] / 1024:.1f} KB)")
+        st.write(f"Cargas de modelo: **{pool_stats['loads']}** · Descartados: **{pool_stats['evictions']}**")
+    
     # Contenido principal según selección
     if app_mode == "Estudiante":
         student_interface()
     else:
         coordinator_mode = st.sidebar.radio("Tipo de análisis:",
-                                           ["Análisis Individual", "Lista de Estudiantes en Riesgo"])
+                                           ["Análisis Individual", "Evaluación por Lote (CSV)",
+                                            "Lista de Estudiantes en Riesgo"])
+        
+        drift_alert()
         
         if coordinator_mode == "Análisis Individual":
             coordinator_manual_input()
+        elif coordinator_mode == "Evaluación por Lote (CSV)":
+            coordinator_batch_scoring()
         else:
             coordinator_risk_list()
             
@@ -0,0 +1,149 @@
+"""Paridad y concurrencia de la API HTTP contra un cliente local (fastapi.testclient).
+
+Levanta la app de prediction_api con TestClient (sin servidor ni red) y verifica:
+- /predict y /predict/batch devuelven el mismo GPA, nivel y recomendaciones que el motor
+  de inferencia y las funciones de predictor_core;
+- las entradas fuera de rango responden 422;
+- las llamadas concurrentes a /predict (agrupadas por el micro-batcher) conservan la
+  paridad, y reporta sus latencias.
+
+Requiere httpx (dependencia de fastapi.testclient).
+
+Uso (desde la raíz del repositorio):
+    python benchmarks/api_benchmark.py --concurrency 16 --requests 800
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+from model_registry import ModelManager  # noqa: E402
+from prediction_api import create_app  # noqa: E402
+from predictor_core import FEATURES, get_recommendations, get_risk_level  # noqa: E402
+
+
+def sample_students(n, seed=0):
+    df = pd.read_csv(os.path.join(REPO_DIR, 'Student_performance_data.csv'))
+    rng = np.random.default_rng(seed)
+    sample = df.iloc[rng.integers(0, len(df), n)].reset_index(drop=True)
+    students = []
+    for i, row in enumerate(sample[FEATURES].to_dict('records')):
+        student = {name: int(row[name]) for name in FEATURES if name != 'StudyTimeWeekly'}
+        student['StudyTimeWeekly'] = round(float(row['StudyTimeWeekly']) * 2) / 2
+        student['StudentID'] = f"E{i:05d}"
+        students.append(student)
+    return students
+
+
+# Diferencias entre una respuesta de la API y el cálculo directo
+def mismatches(result, student, engine):
+    gpa = engine.predict_one([student[name] for name in FEATURES])
+    risk_level, risk_code = get_risk_level(gpa)
+    student_data = {name: student[name] for name in FEATURES}
+    problems = []
+    if abs(result['gpa'] - round(gpa, 4)) > 1e-4:
+        problems.append(f"gpa {result['gpa']} != {gpa:.4f}")
+    if (result['risk_level'], result['risk_code']) != (risk_level, risk_code):
+        problems.append(f"nivel {result['risk_code']} != {risk_code}")
+    if result['recommendations'] != get_recommendations(gpa, student_data):
+        problems.append("recomendaciones distintas")
+    if result['StudentID'] != student['StudentID']:
+        problems.append("StudentID distinto")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Paridad y concurrencia de la API contra TestClient")
+    parser.add_argument('--requests', type=int, default=800, help="Peticiones a /predict en la prueba concurrente")
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    model_path = os.path.join(REPO_DIR, 'WeightBestModel.pkl')
+    registry_dir = os.path.join(REPO_DIR, 'models')
+    engine = ModelManager(registry_dir=registry_dir, fallback_path=model_path).get()
+    app = create_app(model_path=model_path, registry_dir=registry_dir)
+    students = sample_students(max(args.requests, args.batch_size))
+    failures = 0
+
+    with TestClient(app) as client:
+        health = client.get('/health').json()
+        print(f"Modelo {health['model_version']}")
+
+        # /predict, una petición a la vez
+        errors = []
+        for student in students[:50]:
+            response = client.post('/predict', json=student)
+            if response.status_code != 200:
+                errors.append(f"HTTP {response.status_code}")
+            else:
+                errors.extend(mismatches(response.json(), student, engine))
+        print(f"/predict (50 estudiantes): {len(errors)} diferencias")
+        failures += len(errors)
+
+        # /predict/batch
+        batch = students[:args.batch_size]
+        start = time.perf_counter()
+        response = client.post('/predict/batch', json={'students': batch})
+        batch_ms = (time.perf_counter() - start) * 1000
+        errors = [f"HTTP {response.status_code}"] if response.status_code != 200 else [
+            problem for result, student in zip(response.json()['results'], batch)
+            for problem in mismatches(result, student, engine)
+        ]
+        if response.status_code == 200 and response.json()['count'] != len(batch):
+            errors.append("count distinto")
+        print(f"/predict/batch ({len(batch)} estudiantes, {batch_ms:.1f} ms): {len(errors)} diferencias")
+        failures += len(errors)
+
+        # Validación: fuera de rango, campos faltantes y lote vacío
+        invalid = [
+            ('/predict', {**students[0], 'Absences': 31}),
+            ('/predict', {**students[0], 'Age': 14}),
+            ('/predict', {**students[0], 'StudyTimeWeekly': -1}),
+            ('/predict', {**students[0], 'Tutoring': 2}),
+            ('/predict', {name: value for name, value in students[0].items() if name != 'Sports'}),
+            ('/predict/batch', {'students': []}),
+            ('/predict/batch', {'students': [students[0], {**students[1], 'Absences': 99}]}),
+        ]
+        wrong = [(route, payload) for route, payload in invalid if client.post(route, json=payload).status_code != 422]
+        print(f"Entradas inválidas con 422: {len(invalid) - len(wrong)}/{len(invalid)}")
+        failures += len(wrong)
+
+        # /predict concurrente: el micro-batcher agrupa las peticiones en lotes
+        def call(student):
+            start = time.perf_counter()
+            response = client.post('/predict', json=student)
+            elapsed = time.perf_counter() - start
+            if response.status_code != 200:
+                return elapsed, [f"HTTP {response.status_code}"]
+            return elapsed, mismatches(response.json(), student, engine)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            results = list(executor.map(call, students[:args.requests]))
+        total_s = time.perf_counter() - start
+        latencies = np.array([elapsed for elapsed, _ in results]) * 1000
+        errors = [problem for _, problems in results for problem in problems]
+        print(f"/predict concurrente ({args.requests} peticiones, {args.concurrency} hilos): "
+              f"{len(errors)} diferencias, {args.requests / total_s:,.0f} pet/s, "
+              f"p50 {np.percentile(latencies, 50):.2f} ms, p99 {np.percentile(latencies, 99):.2f} ms")
+        failures += len(errors)
+
+        metrics = client.get('/metrics')
+        print(f"/metrics: HTTP {metrics.status_code}, {len(metrics.text.splitlines())} líneas")
+        failures += metrics.status_code != 200
+
+    return 0 if failures == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
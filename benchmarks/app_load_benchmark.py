@@ -0,0 +1,276 @@
+"""Pruebas de carga y latencia de las rutas de la app Streamlit.
+
+Para cada tamaño de historial genera un almacén sintético de predicciones (las
+características se muestrean de Student_performance_data.csv y el GPA se predice con
+el modelo), y ejecuta en modo headless (streamlit.testing AppTest) las rutas
+student_interface, coordinator_manual_input y coordinator_risk_list, primero en
+secuencia (latencia, memoria y asignaciones con tracemalloc) y luego con varios
+usuarios concurrentes (un proceso por usuario). Cuenta como error cada ejecución con una
+excepción o un mensaje de error de la app; si hay alguno el script termina con código 1.
+
+Todo corre en un directorio temporal: no se tocan logs/ ni models/ del proyecto.
+
+Uso (desde la raíz del repositorio):
+    python benchmarks/app_load_benchmark.py --sizes 10000 100000 1000000 --output app_load.json
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+import prediction_store  # noqa: E402
+from model_registry import ModelManager  # noqa: E402
+from predictor_core import FEATURES, risk_codes_batch  # noqa: E402
+
+# Este script: AppTest instala la app como __main__ y los procesos de usuarios concurrentes
+# necesitan importar el benchmark, no la app
+BENCHMARK_MODULE = sys.modules[__name__]
+APP_PATH = os.path.join(REPO_DIR, 'Motivational_interface.py')
+PATHS = ['student_interface', 'coordinator_manual_input', 'coordinator_risk_list']
+
+
+# Historial sintético de n predicciones con la distribución del CSV de entrenamiento
+def build_store(db_path, n, seed=42, chunk_size=100000):
+    df = pd.read_csv(os.path.join(REPO_DIR, 'Student_performance_data.csv'))[FEATURES]
+    engine = ModelManager(registry_dir=os.path.join(REPO_DIR, 'models'),
+                          fallback_path=os.path.join(REPO_DIR, 'WeightBestModel.pkl')).get()
+    rng = np.random.default_rng(seed)
+    start_time = datetime(2025, 8, 1)
+
+    with closing(prediction_store.connect(db_path)) as conn:
+        for offset in range(0, n, chunk_size):
+            size = min(chunk_size, n - offset)
+            sample = df.iloc[rng.integers(0, len(df), size)].reset_index(drop=True)
+            gpas = engine.predict(sample)
+            codes = risk_codes_batch(gpas)
+            sources = np.where(rng.random(size) < 0.8, prediction_store.SOURCE_STUDENT,
+                               prediction_store.SOURCE_COORDINATOR)
+            timestamps = [(start_time + timedelta(seconds=int(s))).isoformat(sep=' ')
+                          for s in np.sort(rng.integers(0, 120 * 86400, size))]
+            rows = [
+                (ts, source, None, *features, float(gpa), int(code))
+                for ts, source, features, gpa, code in zip(
+                    timestamps, sources, sample.itertuples(index=False, name=None), gpas, codes)
+            ]
+            with conn:
+                conn.executemany(prediction_store.INSERT_SQL, rows)
+
+
+# Los mensajes de falla de la app empiezan así; otros st.error son contenido (p. ej. la
+# tarjeta "Intervención Urgente Requerida" de la lista de riesgo o la alerta de deriva)
+ERROR_PREFIXES = ('❌', 'Error')
+
+
+# Excepciones y mensajes de error de la última ejecución del script
+def app_errors(at):
+    return [f"excepción: {element.message}" for element in at.exception] + \
+           [f"st.error: {element.value}" for element in at.error if element.value.startswith(ERROR_PREFIXES)]
+
+
+def new_app(path):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_PATH, default_timeout=120)
+    at.run()
+    if path == 'student_interface':
+        at.sidebar.radio[0].set_value("Estudiante").run()
+    else:
+        at.sidebar.radio[0].set_value("Coordinador Académico").run()
+        mode = "Análisis Individual" if path == 'coordinator_manual_input' else "Lista de Estudiantes en Riesgo"
+        at.sidebar.radio[1].set_value(mode).run()
+    errors = app_errors(at)
+    if errors:
+        raise RuntimeError(f"{path}: {errors[0]}")
+    return at
+
+
+# Una interacción del usuario en la ruta: enviar el formulario o recargar la lista.
+# Devuelve los errores que mostró la app (lista vacía si la ejecución fue limpia)
+def interact(at, path):
+    try:
+        if path == 'coordinator_risk_list':
+            at.run()
+        else:
+            at.button[0].click().run()
+    except Exception as e:
+        return [f"{type(e).__name__}: {str(e)}"]
+    return app_errors(at)
+
+
+def error_summary(errors):
+    return {'errors': len(errors), 'error_messages': sorted(set(errors))[:5]}
+
+
+def percentiles(samples_ms):
+    values = np.asarray(samples_ms)
+    return {
+        'count': int(len(values)),
+        'mean_ms': float(values.mean()),
+        'p50_ms': float(np.percentile(values, 50)),
+        'p90_ms': float(np.percentile(values, 90)),
+        'p99_ms': float(np.percentile(values, 99)),
+        'max_ms': float(values.max()),
+    }
+
+
+def run_sequential(path, iterations):
+    at = new_app(path)
+    errors = interact(at, path)
+
+    samples = []
+    tracemalloc.start()
+    start_current, _ = tracemalloc.get_traced_memory()
+    start_blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics('filename'))
+    for _ in range(iterations):
+        start = time.perf_counter()
+        errors.extend(interact(at, path))
+        samples.append((time.perf_counter() - start) * 1000)
+    current, peak = tracemalloc.get_traced_memory()
+    end_blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics('filename'))
+    tracemalloc.stop()
+
+    result = percentiles(samples)
+    result.update({
+        'peak_traced_mb': (peak - start_current) / 1024 ** 2,
+        'retained_mb': (current - start_current) / 1024 ** 2,
+        'retained_blocks': end_blocks - start_blocks,
+    })
+    result.update(error_summary(errors))
+    return result
+
+
+# Un usuario concurrente: su propio proceso y su propia sesión de AppTest
+def user_session(path, iterations):
+    warnings.filterwarnings('ignore')
+    logging.disable(logging.WARNING)
+    try:
+        at = new_app(path)
+    except Exception as e:
+        return [], [f"{type(e).__name__}: {str(e)}"], None
+    samples, errors = [], []
+    window_start = time.time()
+    for _ in range(iterations):
+        start = time.perf_counter()
+        errors.extend(interact(at, path))
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples, errors, (window_start, time.time())
+
+
+# AppTest reemplaza el Runtime global de Streamlit en cada ejecución, así que varias sesiones
+# en hilos de un mismo proceso se pisan entre sí (KeyError de widgets, árboles vacíos); cada
+# usuario corre en un proceso aparte y todos comparten el almacén y los archivos del campus
+def run_concurrent(path, users, iterations):
+    sys.modules['__main__'] = BENCHMARK_MODULE
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=users, mp_context=context) as executor:
+        sessions = list(executor.map(user_session, [path] * users, [iterations] * users))
+    samples = [s for session_samples, _, _ in sessions for s in session_samples]
+    errors = [e for _, session_errors, _ in sessions for e in session_errors]
+    windows = [window for _, _, window in sessions if window is not None]
+    elapsed = max(end for _, end in windows) - min(start for start, _ in windows) if windows else 0.0
+
+    result = percentiles(samples) if samples else {'count': 0}
+    result.update({'users': users, 'throughput_per_s': len(samples) / elapsed if elapsed else 0.0})
+    result.update(error_summary(errors))
+    return result
+
+
+def max_rss_mb():
+    import resource
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPO_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pruebas de carga de las rutas de la app")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000],
+                        help="Número de predicciones en el historial sintético")
+    parser.add_argument('--paths', nargs='+', choices=PATHS, default=PATHS)
+    parser.add_argument('--iterations', type=int, default=30)
+    parser.add_argument('--users', type=int, default=8, help="Usuarios concurrentes")
+    parser.add_argument('--concurrent-iterations', type=int, default=5)
+    parser.add_argument('--output', help="Archivo JSON con los resultados")
+    args = parser.parse_args()
+
+    warnings.filterwarnings('ignore')
+    # Los logs de la app y de Streamlit en cada ejecución distorsionan las medidas
+    logging.disable(logging.WARNING)
+    report = {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': [],
+    }
+
+    original_dir = os.getcwd()
+    for size in args.sizes:
+        workdir = tempfile.mkdtemp(prefix='gpa-bench-')
+        try:
+            # Modelo y CSV de entrenamiento (línea base del monitoreo de deriva) junto a los datos sintéticos
+            for name in ('WeightBestModel.pkl', 'Student_performance_data.csv'):
+                shutil.copy(os.path.join(REPO_DIR, name), workdir)
+            os.chdir(workdir)
+            start = time.perf_counter()
+            build_store(prediction_store.DB_PATH, size)
+            print(f"\n== Historial de {size:,} predicciones (generado en {time.perf_counter() - start:.1f} s) ==")
+
+            for path in args.paths:
+                sequential = run_sequential(path, args.iterations)
+                concurrent = run_concurrent(path, args.users, args.concurrent_iterations)
+                report['results'].append({
+                    'history_size': size, 'path': path,
+                    'sequential': sequential, 'concurrent': concurrent,
+                })
+                print(f"{path:<26} p50 {sequential['p50_ms']:8.1f} ms  p99 {sequential['p99_ms']:8.1f} ms  "
+                      f"pico {sequential['peak_traced_mb']:6.1f} MB  | {args.users} usuarios: "
+                      f"p50 {concurrent.get('p50_ms', float('nan')):8.1f} ms  "
+                      f"p99 {concurrent.get('p99_ms', float('nan')):8.1f} ms  "
+                      f"{concurrent['throughput_per_s']:6.1f} req/s  | errores {sequential['errors']}"
+                      f"/{concurrent['errors']}")
+                for message in sequential['error_messages'] + concurrent['error_messages']:
+                    print(f"  ❌ {message}")
+        finally:
+            os.chdir(original_dir)
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report['max_rss_mb'] = max_rss_mb()
+    report['errors'] = sum(result[mode]['errors'] for result in report['results']
+                           for mode in ('sequential', 'concurrent'))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResultados guardados en {args.output}")
+    if report['errors']:
+        print(f"\n❌ {report['errors']} ejecuciones con errores de la app")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""Tamaño y velocidad del historial en columnas frente a app.log y al almacén SQLite.
+
+Genera n predicciones sintéticas (características muestreadas de
+Student_performance_data.csv) y las guarda en los tres formatos: líneas de texto como
+las que escribía la app en app.log, la tabla SQLite de prediction_store y los segmentos
+de prediction_history. Compara bytes por predicción, verifica que los agregados de la
+lista de riesgo coincidan con SQLite y mide su tiempo.
+
+Uso (desde la raíz del repositorio):
+    python benchmarks/history_benchmark.py --rows 1000000
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import closing
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+import prediction_history  # noqa: E402
+import prediction_store  # noqa: E402
+from model_registry import ModelManager  # noqa: E402
+from predictor_core import FEATURES, risk_codes_batch  # noqa: E402
+
+
+def synthetic_predictions(n, seed=42):
+    df = pd.read_csv(os.path.join(REPO_DIR, 'Student_performance_data.csv'))[FEATURES]
+    engine = ModelManager(registry_dir=os.path.join(REPO_DIR, 'models'),
+                          fallback_path=os.path.join(REPO_DIR, 'WeightBestModel.pkl')).get()
+    rng = np.random.default_rng(seed)
+    sample = df.iloc[rng.integers(0, len(df), n)].reset_index(drop=True)
+    # Redondeo como en el formulario (paso de 0.5 horas)
+    sample['StudyTimeWeekly'] = (sample['StudyTimeWeekly'] * 2).round() / 2
+    gpas = engine.predict(sample)
+    sources = np.where(rng.random(n) < 0.8, prediction_store.SOURCE_STUDENT, prediction_store.SOURCE_COORDINATOR)
+    start = datetime(2025, 8, 1)
+    timestamps = [start + timedelta(microseconds=int(us))
+                  for us in np.sort(rng.integers(0, 120 * 86400 * 10 ** 6, n))]
+    return sample, gpas, risk_codes_batch(gpas), sources, timestamps
+
+
+def write_app_log(path, sample, gpas, sources, timestamps):
+    with open(path, 'w', encoding='utf-8') as f:
+        for i, (features, gpa, source, ts) in enumerate(zip(sample.to_dict('records'), gpas, sources, timestamps)):
+            prefix = f"{ts:%Y-%m-%d %H:%M:%S},{ts.microsecond // 1000:03d} - __main__ - INFO - "
+            if source == prediction_store.SOURCE_STUDENT:
+                f.write(f"{prefix}Predicción estudiante - GPA: {gpa:.2f}, Datos: {features}\n")
+            else:
+                f.write(f"{prefix}Predicción coordinador - Estudiante: E{i:07d}, GPA: {gpa:.2f}\n")
+
+
+def write_store(db_path, sample, gpas, codes, sources, timestamps):
+    rows = [
+        (ts.isoformat(sep=' '), source, None, *features, float(gpa), int(code))
+        for ts, source, features, gpa, code in zip(
+            timestamps, sources, sample.itertuples(index=False, name=None), gpas, codes)
+    ]
+    with closing(prediction_store.connect(db_path)) as conn, conn:
+        conn.executemany(prediction_store.INSERT_SQL, rows)
+
+
+def best_of(function, repeat=5):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return result, min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Historial en columnas frente a app.log y SQLite")
+    parser.add_argument('--rows', type=int, default=1000000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='gpa-history-')
+    try:
+        log_path = os.path.join(workdir, 'app.log')
+        db_path = os.path.join(workdir, 'predictions.db')
+        history_dir = os.path.join(workdir, 'history')
+
+        sample, gpas, codes, sources, timestamps = synthetic_predictions(args.rows)
+        write_app_log(log_path, sample, gpas, sources, timestamps)
+        write_store(db_path, sample, gpas, codes, sources, timestamps)
+        writer = prediction_history.HistoryWriter(history_dir)
+        writer.append_columns(prediction_history.encode_columns(
+            timestamps, sources, sample.to_numpy(dtype=np.float64), gpas, codes))
+        writer.close()
+
+        sizes = {
+            'app.log': os.path.getsize(log_path),
+            'SQLite (con índices)': os.path.getsize(db_path),
+            'columnas': prediction_history.history_bytes(history_dir),
+        }
+        print(f"{args.rows:,} predicciones")
+        for name, size in sizes.items():
+            print(f"  {name:<22} {size / 1024 ** 2:8.1f} MB  {size / args.rows:6.1f} bytes/predicción  "
+                  f"({sizes['app.log'] / size:4.1f}x menos que app.log)")
+
+        filter_sets = [
+            {'risk_codes': [4, 3]},
+            {'risk_codes': [4, 3, 2, 1], 'min_gpa': 1.5, 'max_gpa': 3.2},
+            {'risk_codes': [4], 'start': datetime(2025, 9, 1), 'end': datetime(2025, 10, 1)},
+            {'source': prediction_store.SOURCE_COORDINATOR},
+        ]
+        print("\nAgregados de la lista de riesgo (mejor de 5):")
+        for filters in filter_sets:
+            sql, sql_s = best_of(lambda: prediction_store.risk_summary(db_path=db_path, **filters))
+            cols, cols_s = best_of(lambda: prediction_history.risk_summary(history_dir, **filters))
+            same = (sql['total'], sql['high_risk'], sql['medium_risk']) == \
+                   (cols['total'], cols['high_risk'], cols['medium_risk'])
+            gpa_diff = abs((sql['avg_gpa'] or 0) - (cols['avg_gpa'] or 0))
+            print(f"  {str(filters):<80} SQLite {sql_s * 1000:7.1f} ms  columnas {cols_s * 1000:6.1f} ms  "
+                  f"conteos iguales: {same}  dif. GPA promedio: {gpa_diff:.1e}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
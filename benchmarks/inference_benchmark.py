@@ -0,0 +1,74 @@
+"""Paridad y velocidad del motor de inferencia frente a model.predict de sklearn.
+
+Uso (desde la raíz del repositorio):
+    python benchmarks/inference_benchmark.py
+"""
+import os
+import sys
+import time
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.tree import DecisionTreeRegressor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from predictor_core import FEATURES, InferenceEngine  # noqa: E402
+
+warnings.filterwarnings('ignore')
+
+
+def time_per_call(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def check_parity(name, model, X):
+    engine = InferenceEngine(model)
+    expected = model.predict(X)
+    batch = engine.predict(X)
+    single = np.array([engine.predict_one(row) for row in X.to_numpy().tolist()[:500]])
+    max_diff = max(np.max(np.abs(batch - expected)), np.max(np.abs(single - expected[:500])))
+    status = "OK" if max_diff < 1e-9 else "FALLA"
+    print(f"{name:<28} lineal={str(engine.is_linear):<5} max |diferencia| = {max_diff:.2e}  {status}")
+    return max_diff < 1e-9
+
+
+def main():
+    df = pd.read_csv('Student_performance_data.csv')
+    X, y = df[FEATURES], df['GPA']
+
+    print("== Paridad con model.predict ==")
+    model = joblib.load('WeightBestModel.pkl')
+    ok = check_parity("WeightBestModel.pkl", model, X)
+    ok &= check_parity("StandardScaler + Linear", Pipeline([('scaler', StandardScaler()),
+                                                             ('model', LinearRegression())]).fit(X, y), X)
+    ok &= check_parity("DecisionTree (sklearn)", DecisionTreeRegressor(max_depth=5, random_state=42).fit(X, y), X)
+
+    print("\n== Latencia por llamada (un estudiante) ==")
+    engine = InferenceEngine(model)
+    row = X.iloc[0].tolist()
+    sklearn_us = time_per_call(lambda: model.predict(pd.DataFrame([row], columns=FEATURES))[0], 500)
+    engine_us = time_per_call(lambda: engine.predict_one(row), 100000)
+    print(f"sklearn (DataFrame de 1 fila): {sklearn_us:10.2f} µs")
+    print(f"InferenceEngine.predict_one:   {engine_us:10.2f} µs  ({sklearn_us / engine_us:,.0f}x)")
+
+    print("\n== Lote de 50.000 estudiantes ==")
+    big = pd.concat([X] * (50000 // len(X) + 1), ignore_index=True).iloc[:50000]
+    matrix = np.ascontiguousarray(big.to_numpy(dtype=np.float64))
+    sklearn_ms = time_per_call(lambda: model.predict(big), 20) / 1000
+    engine_ms = time_per_call(lambda: engine.predict(matrix), 200) / 1000
+    print(f"sklearn model.predict:         {sklearn_ms:10.3f} ms")
+    print(f"InferenceEngine.predict:       {engine_ms:10.3f} ms  ({sklearn_ms / engine_ms:,.1f}x)")
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
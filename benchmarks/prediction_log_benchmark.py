@@ -0,0 +1,62 @@
+"""Rendimiento del registro de predicciones en segundo plano (JSON Lines + SQLite + historial).
+
+Encola n eventos con log_prediction tan rápido como se pueda, detiene el listener (que
+drena la cola) y reporta eventos por segundo de punta a punta. Verifica que el archivo
+JSON Lines, el almacén SQLite y el historial en columnas tengan las n predicciones.
+
+Uso (desde la raíz del repositorio):
+    python benchmarks/prediction_log_benchmark.py --events 20000
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+import prediction_history  # noqa: E402
+import prediction_store  # noqa: E402
+from prediction_log import log_prediction, read_events, start_prediction_log  # noqa: E402
+
+STUDENT = {'Age': 16, 'StudyTimeWeekly': 10.0, 'Absences': 3, 'Tutoring': 1,
+           'Extracurricular': 0, 'Sports': 1, 'Music': 0, 'Volunteering': 0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Eventos por segundo del registro de predicciones")
+    parser.add_argument('--events', type=int, default=20000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='prediction_log_bench_')
+    try:
+        path = os.path.join(workdir, 'predictions.jsonl')
+        db_path = os.path.join(workdir, 'predictions.db')
+        history_dir = os.path.join(workdir, 'history')
+        event_logger, listener = start_prediction_log(path, db_path, history_dir)
+
+        start = time.perf_counter()
+        for i in range(args.events):
+            log_prediction(event_logger, prediction_store.SOURCE_STUDENT, 1.0 + (i % 300) / 100, 2, STUDENT,
+                           model_version='bench')
+        enqueue_s = time.perf_counter() - start
+        listener.stop()
+        total_s = time.perf_counter() - start
+
+        counts = {
+            'JSON Lines': sum(1 for _ in read_events(path)),
+            'SQLite': sum(prediction_store.count_by_source(db_path).values()),
+            'historial': prediction_history.risk_summary(history_dir, source=None)['total'],
+        }
+        print(f"{args.events:,} eventos: encolados en {enqueue_s * 1000:.0f} ms, "
+              f"escritos en {total_s:.2f} s ({args.events / total_s:,.0f} eventos/s)")
+        for name, count in counts.items():
+            print(f"  {name:<11} {count:,} filas")
+        return 0 if all(count == args.events for count in counts.values()) else 1
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
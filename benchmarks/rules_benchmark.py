@@ -0,0 +1,62 @@
+"""Paridad y velocidad del motor de reglas vectorizado.
+
+Compara evaluate_rules_batch/join_recommendations con get_risk_level y
+get_recommendations fila por fila, y mide el tiempo para 1.000.000 de filas.
+
+Uso (desde la raíz del repositorio):
+    python benchmarks/rules_benchmark.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from predictor_core import (  # noqa: E402
+    FEATURES, evaluate_rules_batch, get_recommendations, get_risk_level, join_recommendations,
+)
+
+
+def random_inputs(n, seed=0):
+    rng = np.random.default_rng(seed)
+    features = pd.DataFrame({
+        'Age': rng.integers(15, 26, n),
+        'StudyTimeWeekly': rng.choice(np.arange(0, 40.5, 0.5), n),
+        'Absences': rng.integers(0, 31, n),
+        **{name: rng.integers(0, 2, n) for name in FEATURES[3:]},
+    })[FEATURES].astype(np.float64)
+    gpas = rng.uniform(-0.5, 4.5, n)
+    # Valores en los límites de cada nivel y de cada regla
+    gpas[:6] = [2.0, 3.0, 3.7, 1.99, 2.99, 3.69]
+    features.loc[:5, 'StudyTimeWeekly'] = [10, 15, 25, 9.5, 14.5, 25.5]
+    features.loc[:5, 'Absences'] = [10, 11, 10, 11, 10, 11]
+    return gpas, features
+
+
+def main():
+    gpas, features = random_inputs(20000)
+    risk_codes, fired = evaluate_rules_batch(gpas, features)
+    joined = join_recommendations(fired)
+
+    mismatches = 0
+    for i, (gpa, student_data) in enumerate(zip(gpas, features.to_dict('records'))):
+        if risk_codes[i] != get_risk_level(gpa)[1] or joined[i] != " | ".join(get_recommendations(gpa, student_data)):
+            mismatches += 1
+    print(f"Paridad con las funciones por estudiante (20.000 filas): {mismatches} diferencias")
+
+    gpas, features = random_inputs(1_000_000, seed=1)
+    start = time.perf_counter()
+    risk_codes, fired = evaluate_rules_batch(gpas, features)
+    rules_s = time.perf_counter() - start
+    start = time.perf_counter()
+    join_recommendations(fired)
+    join_s = time.perf_counter() - start
+    print(f"1.000.000 filas - niveles y reglas: {rules_s:.3f} s, textos unidos: {join_s:.3f} s")
+
+    return 0 if mismatches == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""Tiempo de arranque de Motivational_interface.py: importación + primera predicción.
+
+Cada medición corre en un proceso nuevo dentro de un directorio temporal (con una
+copia de WeightBestModel.pkl), así no se escriben registros en logs/ del proyecto.
+
+Uso (desde la raíz del repositorio):
+    python benchmarks/startup_benchmark.py --runs 5 --output startup.json
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD_CODE = """
+import json, resource, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {repo_dir!r})
+import Motivational_interface as app
+imported = time.perf_counter()
+gpa, _ = app.predict_gpa([18, 15.0, 5, 1, 1, 1, 1, 1])
+predicted = time.perf_counter()
+print(json.dumps({{
+    'import_s': imported - start,
+    'first_prediction_ms': (predicted - imported) * 1000,
+    'total_s': predicted - start,
+    'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'gpa': float(gpa),
+    'heavy_modules': sorted(m for m in ('matplotlib', 'seaborn', 'PIL') if m in sys.modules),
+}}))
+"""
+
+
+def run_once(workdir):
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD_CODE.format(repo_dir=REPO_DIR)],
+        cwd=workdir, capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", help="Archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        shutil.copy(os.path.join(REPO_DIR, 'WeightBestModel.pkl'), workdir)
+        runs = [run_once(workdir) for _ in range(args.runs)]
+
+    summary = {
+        'runs': args.runs,
+        'python': sys.version.split()[0],
+        'median_import_s': statistics.median(r['import_s'] for r in runs),
+        'median_first_prediction_ms': statistics.median(r['first_prediction_ms'] for r in runs),
+        'median_total_s': statistics.median(r['total_s'] for r in runs),
+        'median_max_rss_mb': statistics.median(r['max_rss_mb'] for r in runs),
+        'heavy_modules': runs[0]['heavy_modules'],
+    }
+
+    print(f"Importación (incluye precarga del modelo): {summary['median_import_s']:.3f} s")
+    print(f"Primera predicción:                        {summary['median_first_prediction_ms']:.3f} ms")
+    print(f"Total hasta la primera predicción:         {summary['median_total_s']:.3f} s")
+    print(f"RSS máximo:                                {summary['median_max_rss_mb']:.1f} MB")
+    print(f"Módulos pesados cargados:                  {summary['heavy_modules'] or 'ninguno'}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'summary': summary, 'runs': runs}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+"""Monitoreo de deriva de las entradas y del GPA predicho, en streaming.
+
+Cada predicción suma un conteo en un histograma de tamaño fijo por característica
+(las 8 de FEATURES más el GPA predicho), así que la memoria no crece con el tráfico y
+ninguna petición recorre el historial. Los límites de los histogramas salen de la línea
+base de entrenamiento (Student_performance_data.csv): un intervalo por valor en las
+variables discretas, deciles en las continuas y dos intervalos extra para valores por
+debajo del mínimo o por encima del máximo vistos al entrenar.
+
+La línea base del GPA predicho depende del modelo: cada campus tiene su monitor ligado a
+la versión de su modelo, y cuando la versión cambia (recarga en caliente o reentrenamiento)
+se calcula la línea base de la versión nueva y se empieza una ventana nueva.
+
+Un hilo revisa periódicamente cada monitor: cuando la ventana actual junta al menos
+``min_samples`` predicciones calcula PSI y KS (sobre los histogramas) frente a la línea
+base, guarda el resultado y empieza una ventana nueva.
+
+Uso (precalcular la línea base con el modelo activo):
+    python drift_monitor.py --output drift_baseline.json
+"""
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_right
+
+import numpy as np
+import pandas as pd
+
+from predictor_core import FEATURES
+
+
+# Rutas relativas al módulo, no al directorio de trabajo (los benchmarks corren en otro directorio)
+MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(MODULE_DIR, 'drift_baseline.json')
+DATA_PATH = os.path.join(MODULE_DIR, 'Student_performance_data.csv')
+MAX_MODEL_BASELINES = 16
+PREDICTED_GPA = 'GPA_Predicho'
+MONITORED = FEATURES + [PREDICTED_GPA]
+
+# Variables con a lo sumo este número de valores distintos tienen un intervalo por valor
+MAX_DISCRETE_VALUES = 32
+QUANTILES = np.linspace(0.1, 0.9, 9)
+
+# Umbrales habituales del PSI: < 0.1 estable, 0.1-0.25 moderada, >= 0.25 significativa
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.25
+# Valor crítico de KS para dos muestras con alfa = 0.01
+KS_C_ALPHA = 1.628
+EPSILON = 1e-4
+
+DRIFT_LEVELS = {0: 'estable', 1: 'moderada', 2: 'significativa'}
+LABELS = {
+    'Age': "Edad", 'StudyTimeWeekly': "Horas de estudio", 'Absences': "Ausencias", 'Tutoring': "Tutorías",
+    'Extracurricular': "Extracurriculares", 'Sports': "Deportes", 'Music': "Música",
+    'Volunteering': "Voluntariado", PREDICTED_GPA: "GPA predicho",
+}
+
+logger = logging.getLogger(__name__)
+
+
+# Límites interiores de los intervalos para una variable de la línea base
+def _bin_edges(values):
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    low, high = float(values.min()), float(values.max())
+    unique = np.unique(values)
+    if len(unique) <= MAX_DISCRETE_VALUES:
+        inner = (unique[:-1] + unique[1:]) / 2
+    else:
+        inner = np.unique(np.quantile(values, QUANTILES))
+    # Intervalos de cola: por debajo del mínimo y por encima del máximo de entrenamiento
+    return [low] + [float(edge) for edge in inner if low < edge < high] + [float(np.nextafter(high, np.inf))]
+
+
+def _histogram(values, edges):
+    bins = np.searchsorted(edges, np.asarray(values, dtype=np.float64), side='right')
+    return np.bincount(bins, minlength=len(edges) + 1)
+
+
+def _entry(values):
+    edges = _bin_edges(values)
+    counts = _histogram(values, edges)
+    return {'edges': edges, 'proportions': (counts / counts.sum()).tolist()}
+
+
+# Línea base del GPA predicho por un modelo sobre las características de entrenamiento
+def gpa_baseline(engine, training):
+    return _entry(np.asarray(engine.predict(training), dtype=np.float64))
+
+
+# Línea base: límites y proporciones por variable, a partir del CSV de entrenamiento
+def build_baseline(data_path=DATA_PATH, engine=None):
+    training = pd.read_csv(data_path)[FEATURES].astype(np.float64)
+    baseline = {'source': os.path.basename(data_path), 'rows': len(training),
+                'model_version': engine.version if engine is not None else None,
+                'features': {name: _entry(training[name].to_numpy()) for name in FEATURES}}
+    if engine is not None:
+        baseline['features'][PREDICTED_GPA] = gpa_baseline(engine, training)
+    return baseline
+
+
+def save_baseline(baseline, path=BASELINE_PATH):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, ensure_ascii=False, indent=2)
+
+
+def psi(expected, actual):
+    expected = np.maximum(np.asarray(expected, dtype=np.float64), EPSILON)
+    actual = np.maximum(np.asarray(actual, dtype=np.float64), EPSILON)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+# Estadístico KS sobre las distribuciones acumuladas de los intervalos
+def ks_statistic(expected, actual):
+    return float(np.max(np.abs(np.cumsum(expected) - np.cumsum(actual))))
+
+
+def ks_critical(n_expected, n_actual, c_alpha=KS_C_ALPHA):
+    return c_alpha * np.sqrt((n_expected + n_actual) / (n_expected * n_actual))
+
+
+# Comparar conteos de una ventana con la línea base (por variable y nivel global)
+def compare(baseline, counts):
+    features = {}
+    for name, reference in baseline['features'].items():
+        if name not in counts:
+            continue
+        window = np.asarray(counts[name], dtype=np.float64)
+        total = window.sum()
+        if total == 0:
+            continue
+        actual = window / total
+        value = psi(reference['proportions'], actual)
+        ks = ks_statistic(reference['proportions'], actual)
+        level = 2 if value >= PSI_SIGNIFICANT else 1 if value >= PSI_MODERATE else 0
+        features[name] = {
+            'psi': value,
+            'ks': ks,
+            'ks_significant': bool(ks > ks_critical(baseline['rows'], total)),
+            'level': level,
+        }
+    level = max((feature['level'] for feature in features.values()), default=0)
+    return {'features': features, 'level': level, 'drift_level': DRIFT_LEVELS[level]}
+
+
+# Histogramas en streaming de una fuente de predicciones (p. ej. un campus)
+class DriftMonitor:
+    def __init__(self, baseline, min_samples=200, name=None):
+        self.baseline = baseline
+        self.min_samples = min_samples
+        self.name = name
+        self.model_version = baseline.get('model_version')
+        self._edges = [baseline['features'][feature]['edges'] if feature in baseline['features'] else None
+                       for feature in MONITORED]
+        self._counts = [np.zeros(len(edges) + 1, dtype=np.int64) if edges is not None else None
+                        for edges in self._edges]
+        self.window_size = 0
+        self.report = None
+        self._lock = threading.Lock()
+
+    # Sumar una predicción (row en el orden de FEATURES); unos pocos µs
+    def observe(self, row, gpa):
+        with self._lock:
+            for edges, counts, value in zip(self._edges, self._counts, (*row, gpa)):
+                if edges is not None and value is not None:
+                    counts[bisect_right(edges, value)] += 1
+            self.window_size += 1
+
+    # Cerrar la ventana si ya tiene suficientes predicciones; devuelve el reporte nuevo o None
+    def check(self):
+        with self._lock:
+            if self.window_size < self.min_samples:
+                return None
+            counts = {feature: counts.copy() for feature, counts in zip(MONITORED, self._counts)
+                      if counts is not None}
+            size = self.window_size
+            for counts_array in self._counts:
+                if counts_array is not None:
+                    counts_array[:] = 0
+            self.window_size = 0
+
+        report = compare(self.baseline, counts)
+        report['samples'] = size
+        report['checked_at'] = time.time()
+        previous = self.report
+        self.report = report
+        if report['level'] and (previous is None or previous['level'] != report['level']):
+            drifted = [LABELS.get(name, name) for name, feature in report['features'].items() if feature['level']]
+            logger.warning(f"Deriva {report['drift_level']} en las entradas ({self.name or 'principal'}): "
+                           f"{', '.join(drifted)}")
+        return report
+
+
+# Monitores por clave (campus) con un solo hilo que los revisa periódicamente.
+# La línea base de las características se carga una vez (drift_baseline.json precalculado o
+# el CSV de entrenamiento); la del GPA predicho se calcula por versión de modelo. Si no se
+# puede cargar, el monitoreo queda desactivado y no se reintenta en cada predicción
+class DriftMonitors:
+    def __init__(self, baseline_path=BASELINE_PATH, data_path=DATA_PATH, min_samples=200):
+        self.min_samples = min_samples
+        self.monitors = {}
+        self.disabled = None
+        self._gpa_baselines = {}
+        self._training = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._checker = None
+        try:
+            self._load(baseline_path, data_path)
+        except Exception as e:
+            self.disabled = str(e)
+            logger.error(f"Monitoreo de deriva desactivado: {str(e)}")
+
+    def _load(self, baseline_path, data_path):
+        if os.path.exists(data_path):
+            self._training = pd.read_csv(data_path)[FEATURES].astype(np.float64)
+        if os.path.exists(baseline_path):
+            with open(baseline_path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+            gpa = saved['features'].pop(PREDICTED_GPA, None)
+            if gpa is not None:
+                self._gpa_baselines[saved['model_version']] = gpa
+            self.baseline = saved
+        elif self._training is not None:
+            self.baseline = {'source': os.path.basename(data_path), 'rows': len(self._training),
+                             'features': {name: _entry(self._training[name].to_numpy()) for name in FEATURES}}
+        else:
+            raise FileNotFoundError(f"No existe {baseline_path} ni {data_path}")
+
+    # Línea base completa para una versión de modelo (sin GPA predicho si no se puede calcular)
+    def _baseline_for(self, engine):
+        version = engine.version if engine is not None else None
+        if version not in self._gpa_baselines and engine is not None and self._training is not None:
+            if len(self._gpa_baselines) >= MAX_MODEL_BASELINES:
+                in_use = {monitor.model_version for monitor in self.monitors.values()}
+                for old in [old for old in self._gpa_baselines if old not in in_use]:
+                    del self._gpa_baselines[old]
+            self._gpa_baselines[version] = gpa_baseline(engine, self._training)
+        features = dict(self.baseline['features'])
+        if version in self._gpa_baselines:
+            features[PREDICTED_GPA] = self._gpa_baselines[version]
+        return {**self.baseline, 'model_version': version, 'features': features}
+
+    # Monitor del campus para el modelo que hizo la predicción (None si el monitoreo está desactivado)
+    def get(self, key=None, engine=None):
+        if self.disabled:
+            return None
+        version = engine.version if engine is not None else None
+        monitor = self.monitors.get(key)
+        if monitor is None or monitor.model_version != version:
+            with self._lock:
+                monitor = self.monitors.get(key)
+                if monitor is None or monitor.model_version != version:
+                    # Modelo nuevo: línea base de su versión y ventana vacía
+                    monitor = DriftMonitor(self._baseline_for(engine), self.min_samples, key)
+                    self.monitors[key] = monitor
+        return monitor
+
+    # Último reporte del campus (sin tocar los histogramas)
+    def report(self, key=None):
+        monitor = self.monitors.get(key)
+        return monitor.report if monitor is not None else None
+
+    def check_all(self):
+        for monitor in list(self.monitors.values()):
+            try:
+                monitor.check()
+            except Exception as e:
+                logger.error(f"Error revisando deriva: {str(e)}")
+
+    def start_checker(self, interval=60.0):
+        if self._checker is not None:
+            return
+        self._checker = threading.Thread(target=self._check, args=(interval,), name='drift-checker', daemon=True)
+        self._checker.start()
+
+    def stop_checker(self):
+        self._stop.set()
+        if self._checker is not None:
+            self._checker.join()
+            self._checker = None
+
+    def _check(self, interval):
+        while not self._stop.wait(interval):
+            self.check_all()
+
+
+def main():
+    from model_registry import REGISTRY_DIR, ModelManager
+
+    parser = argparse.ArgumentParser(description="Precalcular la línea base del monitoreo de deriva")
+    parser.add_argument('--data', default=DATA_PATH)
+    parser.add_argument('--output', default=BASELINE_PATH)
+    parser.add_argument('--registry', default=REGISTRY_DIR)
+    parser.add_argument('--model', default='WeightBestModel.pkl', help="Modelo a usar si no hay registro")
+    args = parser.parse_args()
+
+    engine = ModelManager(registry_dir=args.registry, fallback_path=args.model).get()
+    if engine is None:
+        raise SystemExit("No se pudo cargar el modelo")
+    baseline = build_baseline(args.data, engine)
+    save_baseline(baseline, args.output)
+    print(f"✅ Línea base de {baseline['rows']:,} filas (versión {engine.version}) guardada en '{args.output}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""Reentrenamiento incremental de los modelos lineales (LinearRegression / Ridge).
+
+En lugar de volver a correr Training.ipynb con todo el CSV, se guardan las estadísticas
+suficientes de mínimos cuadrados: número de filas, medias y la matriz de comomentos
+centrados de [X, y] (la misma información que XᵀX y Xᵀy, pero sin perder precisión al
+centrar). Cada lote nuevo con los GPA reales se suma en O(filas del lote) y el modelo se
+resuelve con un sistema de 8 x 8, así que el WeightBestModel.pkl nuevo sale en
+milisegundos y los datos históricos no se vuelven a leer.
+
+El modelo se guarda como el Pipeline(StandardScaler, LinearRegression/Ridge) de
+train_models.py, y la deriva de R² y RMSE frente a la versión anterior se calcula con
+las mismas estadísticas (sobre el lote nuevo y sobre todo lo acumulado).
+
+Uso:
+    python incremental_training.py init --data Student_performance_data.csv
+    python incremental_training.py update notas_2025_2.csv --model Ridge --alpha 1.0 --publish
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from model_registry import REGISTRY_DIR, ModelManager, publish_model
+from predictor_core import FEATURES, file_checksum, validate_cohort
+from stream_scoring import iter_chunks
+
+
+STATS_PATH = 'training_stats.npz'
+TARGET = 'GPA'
+LINEAR_MODELS = ['LinearRegression', 'Ridge']
+
+
+# Estadísticas suficientes de [X, y]: filas, medias y comomentos centrados (9 x 9)
+class TrainingStats:
+    def __init__(self, n=0, mean=None, comoment=None, batches=()):
+        size = len(FEATURES) + 1
+        self.n = int(n)
+        self.mean = np.zeros(size) if mean is None else np.asarray(mean, dtype=np.float64)
+        self.comoment = np.zeros((size, size)) if comoment is None else np.asarray(comoment, dtype=np.float64)
+        # Checksums de los lotes ya sumados, para no aplicar dos veces el mismo archivo
+        self.batches = list(batches)
+
+    @classmethod
+    def from_arrays(cls, X, y):
+        data = np.column_stack([np.asarray(X, dtype=np.float64), np.asarray(y, dtype=np.float64)])
+        if len(data) == 0:
+            return cls()
+        mean = data.mean(axis=0)
+        centered = data - mean
+        return cls(len(data), mean, centered.T @ centered)
+
+    # Combinar con otras estadísticas (fórmula de Chan para medias y comomentos)
+    def merge(self, other):
+        if other.n == 0:
+            return
+        if self.n == 0:
+            self.n, self.mean, self.comoment = other.n, other.mean.copy(), other.comoment.copy()
+            return
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.comoment = self.comoment + other.comoment + np.outer(delta, delta) * (self.n * other.n / n)
+        self.mean = self.mean + delta * (other.n / n)
+        self.n = n
+
+    def update(self, X, y):
+        self.merge(TrainingStats.from_arrays(X, y))
+
+    # Media y desviación de las características tal como las calcula StandardScaler
+    def scaler(self):
+        var = np.diag(self.comoment)[:-1] / self.n
+        scale = np.sqrt(var)
+        scale[scale == 0] = 1.0
+        return self.mean[:-1], var, scale
+
+    # Coeficientes en el espacio escalado; alpha=0 es LinearRegression
+    def solve(self, alpha=0.0):
+        if self.n < 2:
+            raise ValueError("Se necesitan al menos 2 filas para entrenar")
+        _, _, scale = self.scaler()
+        zz = self.comoment[:-1, :-1] / np.outer(scale, scale)
+        zy = self.comoment[:-1, -1] / scale
+        if alpha:
+            return np.linalg.solve(zz + alpha * np.eye(len(zy)), zy), self.mean[-1]
+        return np.linalg.lstsq(zz, zy, rcond=None)[0], self.mean[-1]
+
+    # R² y RMSE de un modelo lineal (pesos sobre las características sin escalar) sin ver los datos
+    def metrics(self, coef, intercept):
+        weights = np.append(-np.asarray(coef, dtype=np.float64), 1.0)
+        mean_residual = self.mean[-1] - float(np.dot(coef, self.mean[:-1])) - intercept
+        sse = max(float(weights @ self.comoment @ weights) + self.n * mean_residual ** 2, 0.0)
+        sst = self.comoment[-1, -1]
+        return {'R2': 1 - sse / sst if sst else None, 'RMSE': np.sqrt(sse / self.n)}
+
+    def save(self, path=STATS_PATH):
+        # Escritura atómica: un proceso interrumpido no deja estadísticas a medias
+        directory = os.path.dirname(path) or '.'
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.npz')
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, n=self.n, mean=self.mean, comoment=self.comoment,
+                     batches=np.array(self.batches, dtype=str))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=STATS_PATH):
+        with np.load(path) as data:
+            return cls(int(data['n']), data['mean'], data['comoment'], data['batches'].tolist())
+
+
+# Lote con GPA reales: valida y devuelve (X, y) bloque a bloque
+def iter_labeled_chunks(path, chunk_size=50000):
+    first_row = 0
+    for chunk in iter_chunks(path, chunk_size):
+        if TARGET not in chunk.columns:
+            raise ValueError(f"Falta la columna {TARGET} con el GPA real")
+        X = validate_cohort(chunk, first_row).to_numpy(dtype=np.float64)
+        y = pd.to_numeric(chunk[TARGET], errors='coerce').to_numpy(dtype=np.float64)
+        if np.isnan(y).any():
+            rows = [str(first_row + i + 2) for i in np.flatnonzero(np.isnan(y))[:5]]
+            raise ValueError(f"{int(np.isnan(y).sum())} filas sin GPA real válido "
+                             f"(por ejemplo, filas {', '.join(rows)} del CSV)")
+        yield X, y
+        first_row += len(chunk)
+
+
+# Pipeline(StandardScaler, modelo) ya ajustado a partir de las estadísticas, como en train_models.py
+def build_model(stats, kind='LinearRegression', alpha=1.0):
+    from sklearn.linear_model import LinearRegression, Ridge
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    if kind not in LINEAR_MODELS:
+        raise ValueError(f"Modelo no soportado para reentrenamiento incremental: {kind}")
+    estimator = Ridge(alpha=alpha, random_state=42) if kind == 'Ridge' else LinearRegression()
+    coef, intercept = stats.solve(alpha if kind == 'Ridge' else 0.0)
+
+    scaler = StandardScaler()
+    scaler.mean_, scaler.var_, scaler.scale_ = stats.scaler()
+    scaler.n_samples_seen_ = stats.n
+    for step in (scaler, estimator):
+        step.n_features_in_ = len(FEATURES)
+        step.feature_names_in_ = np.array(FEATURES, dtype=object)
+    estimator.coef_ = coef
+    estimator.intercept_ = float(intercept)
+    return Pipeline([('scaler', scaler), ('model', estimator)])
+
+
+def _dump_atomic(model, path):
+    import joblib
+
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.pkl')
+    os.close(fd)
+    joblib.dump(model, tmp_path)
+    os.replace(tmp_path, path)
+
+
+# Estadísticas iniciales a partir del CSV de entrenamiento (la única lectura completa)
+def init_stats(data_path, stats_path=STATS_PATH, chunk_size=50000):
+    stats = TrainingStats()
+    for X, y in iter_labeled_chunks(data_path, chunk_size):
+        stats.update(X, y)
+    stats.batches.append(file_checksum(data_path))
+    stats.save(stats_path)
+    return stats
+
+
+# Sumar un lote con GPA reales, guardar el modelo nuevo y medir la deriva frente al anterior
+def retrain(batch_path, previous=None, stats_path=STATS_PATH, output_model='WeightBestModel.pkl',
+            kind='LinearRegression', alpha=1.0, chunk_size=50000):
+    stats = TrainingStats.load(stats_path)
+    checksum = file_checksum(batch_path)
+    if checksum in stats.batches:
+        raise ValueError(f"El lote {batch_path} ya fue incorporado")
+
+    # Una sola pasada por el lote: estadísticas del lote y error del modelo anterior
+    batch = TrainingStats()
+    previous_sse = 0.0
+    for X, y in iter_labeled_chunks(batch_path, chunk_size):
+        batch.update(X, y)
+        if previous is not None:
+            previous_sse += float(np.sum((previous.predict(X) - y) ** 2))
+    if batch.n == 0:
+        raise ValueError(f"El lote {batch_path} no tiene filas")
+
+    # sklearn y joblib se importan antes de medir: fit_ms es el ajuste y el guardado, no la importación
+    import joblib  # noqa: F401
+    import sklearn.linear_model  # noqa: F401
+    import sklearn.pipeline  # noqa: F401
+    import sklearn.preprocessing  # noqa: F401
+
+    start = time.perf_counter()
+    stats.merge(batch)
+    stats.batches.append(checksum)
+    model = build_model(stats, kind, alpha)
+    _dump_atomic(model, output_model)
+    stats.save(stats_path)
+    fit_ms = (time.perf_counter() - start) * 1000
+
+    # Pesos sobre las características sin escalar (igual que InferenceEngine)
+    scaler, estimator = model.named_steps['scaler'], model.named_steps['model']
+    coef = estimator.coef_ / scaler.scale_
+    intercept = estimator.intercept_ - float(np.dot(coef, scaler.mean_))
+
+    report = {
+        'rows_batch': batch.n,
+        'rows_total': stats.n,
+        'fit_ms': fit_ms,
+        'model': kind,
+        'previous_version': previous.version if previous is not None else None,
+        'batch': {'new': batch.metrics(coef, intercept), 'previous': None},
+        'total': {'new': stats.metrics(coef, intercept), 'previous': None},
+    }
+    if previous is not None:
+        sst = batch.comoment[-1, -1]
+        report['batch']['previous'] = {'R2': 1 - previous_sse / sst if sst else None,
+                                       'RMSE': np.sqrt(previous_sse / batch.n)}
+        # En todo lo acumulado solo se puede medir sin releer datos si el modelo anterior es lineal
+        if previous.is_linear:
+            report['total']['previous'] = stats.metrics(previous.coef, previous.intercept)
+    return report
+
+
+def _format_drift(name, rows, metrics):
+    new = metrics['new']
+    if metrics['previous'] is None:
+        return f"  {name} ({rows:,} filas): R² {new['R2']:.4f}  RMSE {new['RMSE']:.4f}"
+    old = metrics['previous']
+    return (f"  {name} ({rows:,} filas): R² {old['R2']:.4f} -> {new['R2']:.4f} ({new['R2'] - old['R2']:+.4f})  "
+            f"RMSE {old['RMSE']:.4f} -> {new['RMSE']:.4f} ({new['RMSE'] - old['RMSE']:+.4f})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reentrenamiento incremental de los modelos lineales")
+    parser.add_argument('--stats', default=STATS_PATH, help="Archivo de estadísticas suficientes")
+    parser.add_argument('--chunk-size', type=int, default=50000, help="Filas por bloque al leer")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    init = subparsers.add_parser('init', help="Crear las estadísticas desde el CSV de entrenamiento")
+    init.add_argument('--data', default='Student_performance_data.csv')
+    update = subparsers.add_parser('update', help="Sumar un lote con GPA reales y guardar el modelo nuevo")
+    update.add_argument('batch', help="CSV, Parquet o Arrow IPC con las columnas del modelo y GPA")
+    update.add_argument('--model', choices=LINEAR_MODELS, default='LinearRegression')
+    update.add_argument('--alpha', type=float, default=1.0, help="Regularización de Ridge")
+    update.add_argument('--output-model', default='WeightBestModel.pkl')
+    update.add_argument('--previous-model', default='WeightBestModel.pkl',
+                        help="Modelo que sirve la app si no hay registro (línea base de la comparación)")
+    update.add_argument('--registry', default=REGISTRY_DIR)
+    update.add_argument('--publish', action='store_true',
+                        help=f"Publicar el modelo nuevo como versión activa en {REGISTRY_DIR}/")
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'init':
+            stats = init_stats(args.data, args.stats, args.chunk_size)
+            print(f"✅ Estadísticas creadas con {stats.n:,} filas en '{args.stats}'")
+            return
+
+        if not os.path.exists(args.stats):
+            raise SystemExit(f"❌ No existe '{args.stats}'; ejecute primero: python incremental_training.py init")
+        # Versión que está sirviendo la app (registro o pickle suelto), aunque --output-model apunte a otro archivo
+        previous = ModelManager(registry_dir=args.registry, fallback_path=args.previous_model).get()
+        report = retrain(args.batch, previous, args.stats, args.output_model, args.model, args.alpha,
+                         args.chunk_size)
+    except ValueError as e:
+        raise SystemExit(f"❌ {str(e)}")
+
+    print(f"✅ {report['model']} reentrenado con {report['rows_total']:,} filas en {report['fit_ms']:.1f} ms "
+          f"- guardado en '{args.output_model}'")
+    print(f"📊 Deriva frente a la versión anterior ({report['previous_version'] or 'sin modelo'}):")
+    print(_format_drift("lote nuevo", report['rows_batch'], report['batch']))
+    print(_format_drift("acumulado", report['rows_total'], report['total']))
+
+    if args.publish:
+        version = publish_model(args.output_model, args.registry)
+        print(f"🚀 Versión publicada en el registro: {version}")
+
+
+if __name__ == "__main__":
+    main()
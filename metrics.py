@@ -0,0 +1,235 @@
+"""Métricas de la app y la API en formato de texto de Prometheus.
+
+Contadores, histogramas de duración por etapa y gauges calculados al exportar. Cada
+observación es una búsqueda binaria en los límites del histograma más una suma bajo un
+lock (del orden de 1 µs), así que se puede medir en cada petición.
+
+La app escribe el texto periódicamente en ``logs/metrics.prom`` (formato del textfile
+collector de node_exporter) y la API lo sirve en ``GET /metrics``.
+"""
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+
+
+METRICS_PATH = 'logs/metrics.prom'
+
+# Límites de los histogramas de duración, en segundos (50 µs a 2.5 s)
+DURATION_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                    0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labelnames, labels, extra=()):
+    pairs = list(zip(labelnames, labels)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def get(self, *labels):
+        return self.values.get(labels, 0)
+
+    def total(self):
+        with self._lock:
+            return sum(self.values.values())
+
+    def collect(self):
+        with self._lock:
+            items = sorted(self.values.items())
+        for labels, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+# Valores calculados al exportar (p. ej. el estado de la caché de predicciones)
+class Gauge:
+    kind = 'gauge'
+
+    def __init__(self, name, help_text, labelnames=(), callback=None):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+        self.values = {}
+
+    def set(self, value, *labels):
+        self.values[labels] = value
+
+    def collect(self):
+        values = self.callback() if self.callback is not None else dict(self.values)
+        for labels, value in sorted(values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+# Mide la duración de un bloque ``with`` y la registra en el histograma
+class _Timer:
+    __slots__ = ('histogram', 'labels', 'start')
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+        return False
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DURATION_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # etiquetas -> [conteos por intervalo (el último es +Inf), suma, total]
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self.values.get(labels)
+            if series is None:
+                series = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, *labels):
+        return _Timer(self, labels)
+
+    # Total, media y percentil aproximado (límite superior del intervalo) de una serie
+    def summary(self, *labels, quantile=0.95):
+        with self._lock:
+            series = self.values.get(labels)
+            if series is None:
+                return {'count': 0, 'mean': 0.0, 'quantile': 0.0}
+            counts, total, count = list(series[0]), series[1], series[2]
+        target, cumulative = quantile * count, 0
+        upper = float('inf')
+        for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += bucket_count
+            if cumulative >= target:
+                upper = bound
+                break
+        return {'count': count, 'mean': total / count, 'quantile': upper}
+
+    def series(self):
+        with self._lock:
+            return sorted(self.values)
+
+    def collect(self):
+        with self._lock:
+            items = sorted((labels, (list(series[0]), series[1], series[2])) for labels, series in self.values.items())
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = _format_labels(self.labelnames, labels, [('le', _format_value(bound))])
+                yield f"{self.name}_bucket{le} {cumulative}"
+            label_text = _format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{label_text} {_format_value(total)}"
+            yield f"{self.name}_count{label_text} {count}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = {}
+        self._exporter = None
+        self._stop = threading.Event()
+
+    # Registrar una métrica; si ya existe con ese nombre se devuelve la existente
+    def _register(self, metric):
+        return self.metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DURATION_BUCKETS):
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def gauge(self, name, help_text, labelnames=(), callback=None):
+        gauge = self._register(Gauge(name, help_text, labelnames))
+        if callback is not None:
+            gauge.callback = callback
+        return gauge
+
+    def render(self):
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+    # Escribir el texto de forma atómica para que el scraper nunca lea un archivo a medias
+    def write_textfile(self, path=METRICS_PATH):
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-metrics-')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+    def start_textfile_exporter(self, path=METRICS_PATH, interval=15.0):
+        if self._exporter is not None:
+            return
+        self._exporter = threading.Thread(target=self._export, args=(path, interval),
+                                          name='metrics-exporter', daemon=True)
+        self._exporter.start()
+
+    def stop_textfile_exporter(self):
+        self._stop.set()
+        if self._exporter is not None:
+            self._exporter.join()
+            self._exporter = None
+
+    def _export(self, path, interval):
+        while True:
+            try:
+                self.write_textfile(path)
+            except OSError:
+                pass
+            if self._stop.wait(interval):
+                break
+
+
+# Registro del proceso y métricas comunes a la app y la API
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    'gpa_stage_duration_seconds', "Duración de cada etapa de una petición", ['stage'])
+PREDICTIONS = REGISTRY.counter(
+    'gpa_predictions_total', "Predicciones por origen y nivel de riesgo", ['source', 'risk_code'])
+ERRORS = REGISTRY.counter(
+    'gpa_errors_total', "Errores por etapa", ['stage'])
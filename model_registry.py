@@ -0,0 +1,202 @@
+"""Registro de versiones del modelo y recarga en caliente.
+
+Estructura del directorio de registro:
+
+    models/
+        CURRENT                      <- nombre de la versión activa
+        20251020-101500-1a2b3c4d.pkl
+        20251020-101500-1a2b3c4d.pkl.sha256
+
+Publicar una versión nueva (``python model_registry.py publish WeightBestModel.pkl``)
+solo escribe archivos nuevos y reemplaza CURRENT de forma atómica. Los procesos en
+ejecución detectan el cambio con un hilo vigilante, cargan y verifican el modelo
+fuera del camino de las peticiones y después cambian la referencia de una vez.
+"""
+import argparse
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from datetime import datetime
+
+from predictor_core import InferenceEngine, file_checksum
+
+
+REGISTRY_DIR = 'models'
+CURRENT_FILE = 'CURRENT'
+
+logger = logging.getLogger(__name__)
+
+
+def _write_atomic(path, text):
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+# Copiar un modelo al registro como nueva versión y activarla
+def publish_model(model_path, registry_dir=REGISTRY_DIR, activate=True):
+    os.makedirs(registry_dir, exist_ok=True)
+    checksum = file_checksum(model_path)
+    version = f"{datetime.now():%Y%m%d-%H%M%S}-{checksum[:8]}"
+    artifact = os.path.join(registry_dir, f"{version}.pkl")
+
+    fd, tmp_path = tempfile.mkstemp(dir=registry_dir, prefix='.tmp-')
+    os.close(fd)
+    shutil.copyfile(model_path, tmp_path)
+    os.replace(tmp_path, artifact)
+    _write_atomic(f"{artifact}.sha256", checksum + "\n")
+
+    if activate:
+        _write_atomic(os.path.join(registry_dir, CURRENT_FILE), version + "\n")
+    return version
+
+
+# Versión activa según CURRENT (None si el registro no existe)
+def current_version(registry_dir=REGISTRY_DIR):
+    try:
+        with open(os.path.join(registry_dir, CURRENT_FILE), 'r', encoding='utf-8') as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+# Cargar una versión del registro verificando su checksum
+def load_version(version, registry_dir=REGISTRY_DIR):
+    import joblib
+
+    artifact = os.path.join(registry_dir, f"{version}.pkl")
+    with open(f"{artifact}.sha256", 'r', encoding='utf-8') as f:
+        expected = f.read().strip()
+    actual = file_checksum(artifact)
+    if actual != expected:
+        raise ValueError(f"Checksum inválido para la versión {version}")
+    return InferenceEngine(joblib.load(artifact), version=version)
+
+
+# Mantiene el modelo activo y lo reemplaza en caliente cuando cambia CURRENT
+class ModelManager:
+    def __init__(self, registry_dir=REGISTRY_DIR, fallback_path='WeightBestModel.pkl'):
+        self.registry_dir = registry_dir
+        self.fallback_path = fallback_path
+        self.engine = None
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher = None
+        self._last_error = None
+        # (st_mtime_ns, st_size) del pickle suelto y su checksum: solo se vuelve a leer si cambia
+        self._fallback_stat = None
+        self._fallback_checksum = None
+        self.reload()
+
+    # Modelo activo; cada petición debe tomarlo una sola vez y usar esa referencia
+    def get(self):
+        return self.engine
+
+    @property
+    def version(self):
+        engine = self.engine
+        return engine.version if engine is not None else None
+
+    # Archivo .pkl de la versión activa (para medir su tamaño sin serializar el modelo)
+    @property
+    def artifact_path(self):
+        version = self.version
+        if version is None:
+            return None
+        if version.startswith('local-'):
+            return self.fallback_path
+        return os.path.join(self.registry_dir, f"{version}.pkl")
+
+    def _load(self):
+        version = current_version(self.registry_dir)
+        if version is not None:
+            if self.engine is not None and self.engine.version == version:
+                return None
+            return load_version(version, self.registry_dir)
+
+        # Sin registro: usar el pickle suelto del proyecto
+        import joblib
+
+        version = f"local-{self._fallback_version()[:12]}"
+        if self.engine is not None and self.engine.version == version:
+            return None
+        return InferenceEngine(joblib.load(self.fallback_path), version=version)
+
+    # Checksum del pickle suelto; el vigilante solo hace stat en cada revisión
+    def _fallback_version(self):
+        stat = os.stat(self.fallback_path)
+        key = (stat.st_mtime_ns, stat.st_size)
+        if key != self._fallback_stat:
+            self._fallback_checksum = file_checksum(self.fallback_path)
+            self._fallback_stat = key
+        return self._fallback_checksum
+
+    # Cargar la versión activa si cambió; devuelve True si hubo reemplazo
+    def reload(self):
+        with self._reload_lock:
+            try:
+                engine = self._load()
+            except Exception as e:
+                # El vigilante reintenta cada intervalo; registrar cada error distinto una sola vez
+                if str(e) != self._last_error:
+                    logger.error(f"Error cargando modelo: {str(e)}")
+                    self._last_error = str(e)
+                return False
+            self._last_error = None
+            if engine is None:
+                return False
+
+            previous = self.version
+            # Reemplazo atómico de la referencia: las peticiones en curso conservan el modelo anterior
+            self.engine = engine
+            kind = 'lineal, forma cerrada' if engine.is_linear else 'sklearn'
+            if previous is None:
+                logger.info(f"Modelo cargado exitosamente: versión {engine.version} ({kind})")
+            else:
+                logger.info(f"Modelo actualizado en caliente: {previous} -> {engine.version} ({kind})")
+            return True
+
+    def start_watcher(self, interval=5.0):
+        if self._watcher is not None:
+            return
+        self._watcher = threading.Thread(target=self._watch, args=(interval,), name='model-watcher', daemon=True)
+        self._watcher.start()
+
+    def stop_watcher(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def _watch(self, interval):
+        while not self._stop.wait(interval):
+            self.reload()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Registro de versiones del modelo")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    publish = subparsers.add_parser('publish', help="Publicar un .pkl como nueva versión activa")
+    publish.add_argument('model_path')
+    publish.add_argument('--registry', default=REGISTRY_DIR)
+    publish.add_argument('--no-activate', action='store_true')
+    activate = subparsers.add_parser('activate', help="Activar una versión existente (o revertir)")
+    activate.add_argument('version')
+    activate.add_argument('--registry', default=REGISTRY_DIR)
+    args = parser.parse_args()
+
+    if args.command == 'publish':
+        version = publish_model(args.model_path, args.registry, activate=not args.no_activate)
+        print(f"Versión publicada: {version}")
+    else:
+        load_version(args.version, args.registry)
+        _write_atomic(os.path.join(args.registry, CURRENT_FILE), args.version + "\n")
+        print(f"Versión activa: {args.version}")
+
+
+if __name__ == "__main__":
+    main()
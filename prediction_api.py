@@ -0,0 +1,215 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+import numpy as np
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field
+
+from metrics import ERRORS, PREDICTIONS, REGISTRY, STAGE_SECONDS
+from model_registry import REGISTRY_DIR, ModelManager
+from predictor_core import FEATURES, get_recommendations, get_risk_level
+
+
+MODEL_PATH = 'WeightBestModel.pkl'
+SOURCE_API = 'api'
+
+logger = logging.getLogger(__name__)
+
+
+# Datos de entrada de un estudiante (mismas 8 características que el formulario)
+class StudentFeatures(BaseModel):
+    StudentID: Optional[str] = None
+    Age: int = Field(ge=15, le=25)
+    StudyTimeWeekly: float = Field(ge=0, le=40)
+    Absences: int = Field(ge=0, le=30)
+    Tutoring: int = Field(ge=0, le=1)
+    Extracurricular: int = Field(ge=0, le=1)
+    Sports: int = Field(ge=0, le=1)
+    Music: int = Field(ge=0, le=1)
+    Volunteering: int = Field(ge=0, le=1)
+
+
+class BatchRequest(BaseModel):
+    students: List[StudentFeatures] = Field(min_length=1)
+
+
+# Agrupa predicciones individuales concurrentes en una sola llamada a model.predict
+class MicroBatcher:
+    def __init__(self, models, max_batch_size=64, max_wait_ms=2.0):
+        self.models = models
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.queue = asyncio.Queue()
+        self.task = None
+
+    def start(self):
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+
+    async def predict(self, row):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((row, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            rows = [row for row, _ in batch]
+            # Todo el lote usa la misma versión del modelo aunque haya una recarga en curso
+            model = self.models.get()
+            try:
+                # model.predict corre fuera del event loop para no bloquear otras peticiones
+                with STAGE_SECONDS.time('api_micro_batch'):
+                    predictions = await loop.run_in_executor(None, predict_rows, model, rows)
+            except Exception as e:
+                ERRORS.inc('api_micro_batch')
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future), gpa in zip(batch, predictions):
+                if not future.done():
+                    future.set_result((float(gpa), model.version))
+
+
+# Latencias recientes por ruta para reportar p50/p99
+class LatencyTracker:
+    def __init__(self, window=10000):
+        self.window = window
+        self.samples = {}
+
+    def record(self, route, seconds):
+        self.samples.setdefault(route, deque(maxlen=self.window)).append(seconds * 1000)
+
+    def summary(self):
+        result = {}
+        for route, samples in self.samples.items():
+            values = np.fromiter(samples, dtype=np.float64)
+            result[route] = {
+                'count': len(values),
+                'p50_ms': round(float(np.percentile(values, 50)), 3),
+                'p99_ms': round(float(np.percentile(values, 99)), 3),
+            }
+        return result
+
+
+def predict_rows(model, rows):
+    return model.predict(np.asarray(rows, dtype=np.float64))
+
+
+def build_result(student, gpa, model_version):
+    student_data = student.model_dump(include=set(FEATURES))
+    risk_level, risk_code = get_risk_level(gpa)
+    PREDICTIONS.inc(SOURCE_API, risk_code)
+    return {
+        'StudentID': student.StudentID,
+        'gpa': round(float(gpa), 4),
+        'risk_level': risk_level,
+        'risk_code': risk_code,
+        'recommendations': get_recommendations(gpa, student_data),
+        'model_version': model_version,
+    }
+
+
+def create_app(model_path=MODEL_PATH, registry_dir=REGISTRY_DIR, max_batch_size=64, max_wait_ms=2.0,
+               reload_interval=5.0):
+    latencies = LatencyTracker()
+
+    @asynccontextmanager
+    async def lifespan(app):
+        # El modelo se carga una vez por proceso y se recarga en caliente desde el registro
+        app.state.models = ModelManager(registry_dir=registry_dir, fallback_path=model_path)
+        if app.state.models.get() is None:
+            raise RuntimeError("No se pudo cargar el modelo")
+        app.state.models.start_watcher(interval=reload_interval)
+        app.state.batcher = MicroBatcher(app.state.models, max_batch_size, max_wait_ms)
+        app.state.batcher.start()
+        logger.info(f"API de predicción iniciada con modelo {app.state.models.version}")
+        yield
+        await app.state.batcher.stop()
+        app.state.models.stop_watcher()
+
+    app = FastAPI(title="Predictor de Rendimiento Académico - API", lifespan=lifespan)
+
+    @app.get("/health")
+    async def health():
+        return {'status': 'ok', 'model_version': app.state.models.version}
+
+    @app.post("/predict")
+    async def predict(student: StudentFeatures):
+        start = time.perf_counter()
+        row = [getattr(student, name) for name in FEATURES]
+        try:
+            gpa, model_version = await app.state.batcher.predict(row)
+        except Exception as e:
+            ERRORS.inc('api_predict')
+            logger.error(f"Error en predicción API: {str(e)}")
+            raise HTTPException(status_code=500, detail="Error al calcular la predicción")
+        result = build_result(student, gpa, model_version)
+        elapsed = time.perf_counter() - start
+        latencies.record('/predict', elapsed)
+        STAGE_SECONDS.observe(elapsed, 'api_predict')
+        return result
+
+    @app.post("/predict/batch")
+    async def predict_batch(request: BatchRequest):
+        start = time.perf_counter()
+        rows = [[getattr(student, name) for name in FEATURES] for student in request.students]
+        try:
+            model = app.state.models.get()
+            loop = asyncio.get_running_loop()
+            predictions = await loop.run_in_executor(None, predict_rows, model, rows)
+        except Exception as e:
+            ERRORS.inc('api_predict_batch')
+            logger.error(f"Error en predicción API por lote: {str(e)}")
+            raise HTTPException(status_code=500, detail="Error al calcular las predicciones")
+        results = [build_result(student, gpa, model.version) for student, gpa in zip(request.students, predictions)]
+        elapsed = time.perf_counter() - start
+        latencies.record('/predict/batch', elapsed)
+        STAGE_SECONDS.observe(elapsed, 'api_predict_batch')
+        return {'count': len(results), 'results': results}
+
+    @app.get("/metrics/latency")
+    async def latency_metrics():
+        return latencies.summary()
+
+    # Texto de Prometheus con los contadores e histogramas del proceso
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def metrics():
+        return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+    return app
+
+
+app = create_app()
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    uvicorn.run("prediction_api:app", host="127.0.0.1", port=8000, workers=2)
@@ -0,0 +1,113 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from predictor_core import FEATURES
+
+
+# Rejilla discreta que permiten los formularios de estudiante y coordinador
+AGE_RANGE = (15, 25)
+STUDY_TIME_MAX = 40.0
+STUDY_TIME_STEP = 0.5
+ABSENCES_MAX = 30
+N_FLAGS = len(FEATURES) - 3
+
+
+def _grid_index(row):
+    age, study_time, absences, *flags = row
+    study_steps = study_time / STUDY_TIME_STEP
+    if not (AGE_RANGE[0] <= age <= AGE_RANGE[1] and age == int(age)):
+        return None
+    if not (0 <= study_time <= STUDY_TIME_MAX and study_steps == int(study_steps)):
+        return None
+    if not (0 <= absences <= ABSENCES_MAX and absences == int(absences)):
+        return None
+    if any(flag not in (0, 1) for flag in flags):
+        return None
+
+    flag_bits = 0
+    for flag in flags:
+        flag_bits = (flag_bits << 1) | int(flag)
+    return int(age) - AGE_RANGE[0], int(study_steps), int(absences), flag_bits
+
+
+# Todas las combinaciones de la rejilla en el orden de FEATURES
+def grid_rows():
+    ages = np.arange(AGE_RANGE[0], AGE_RANGE[1] + 1, dtype=np.float64)
+    study_times = np.arange(0, STUDY_TIME_MAX + STUDY_TIME_STEP, STUDY_TIME_STEP, dtype=np.float64)
+    absences = np.arange(0, ABSENCES_MAX + 1, dtype=np.float64)
+    flag_bits = np.arange(2 ** N_FLAGS)
+    flags = ((flag_bits[:, None] >> np.arange(N_FLAGS - 1, -1, -1)) & 1).astype(np.float64)
+
+    grid = np.meshgrid(ages, study_times, absences, flag_bits, indexing='ij')
+    rows = np.empty(grid[0].shape + (len(FEATURES),), dtype=np.float64)
+    rows[..., 0], rows[..., 1], rows[..., 2] = grid[0], grid[1], grid[2]
+    rows[..., 3:] = flags[grid[3]]
+    return rows.reshape(-1, len(FEATURES))
+
+
+# Caché LRU de predicciones, invalidada cuando cambia la versión del modelo
+class PredictionCache:
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.model_version = None
+        self.entries = OrderedDict()
+        self.table = None
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _check_version(self, engine):
+        if engine.version != self.model_version:
+            self.entries.clear()
+            self.table = None
+            self.hits = 0
+            self.misses = 0
+            self.model_version = engine.version
+
+    # Precalcular la rejilla completa con una sola predicción vectorizada (~7 MB)
+    def precompute(self, engine):
+        table = engine.predict(grid_rows())
+        shape = (AGE_RANGE[1] - AGE_RANGE[0] + 1, int(STUDY_TIME_MAX / STUDY_TIME_STEP) + 1,
+                 ABSENCES_MAX + 1, 2 ** N_FLAGS)
+        with self._lock:
+            self._check_version(engine)
+            self.table = np.asarray(table, dtype=np.float64).reshape(shape)
+
+    def predict(self, engine, row):
+        key = tuple(row)
+        with self._lock:
+            self._check_version(engine)
+
+            if self.table is not None:
+                index = _grid_index(key)
+                if index is not None:
+                    self.hits += 1
+                    return float(self.table[index])
+
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+
+        gpa = engine.predict_one(row)
+
+        with self._lock:
+            if engine.version == self.model_version:
+                self.entries[key] = gpa
+                if len(self.entries) > self.maxsize:
+                    self.entries.popitem(last=False)
+        return gpa
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'size': len(self.entries),
+                'precomputed': self.table is not None,
+            }
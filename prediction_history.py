@@ -0,0 +1,374 @@
+"""Historial de predicciones en columnas binarias de ancho fijo.
+
+Cada segmento es un directorio con un archivo por columna, solo de anexado:
+
+    logs/history/
+        seg-000000/
+            timestamp.i8          <- microsegundos desde 1970-01-01 (hora local, como el resto de logs)
+            age.u1  absences.u1   <- 255 = dato no registrado
+            study_time_weekly.f4  <- NaN = dato no registrado
+            gpa.f4
+            flags.u1              <- bits 0-4: Tutoring, Extracurricular, Sports, Music, Volunteering
+                                     bit 5: origen (0 = estudiante, 1 = coordinador)
+                                     bits 6-7: nivel de riesgo - 1
+
+Son 19 bytes por predicción (una línea de app.log ocupa unos 200-250). La lectura mapea los
+archivos en memoria con ``np.memmap`` sin copiarlos, y los agregados de la lista de
+riesgo se calculan recorriendo las columnas. Un segmento se cierra al llegar a
+SEGMENT_ROWS filas, así que los segmentos antiguos se pueden archivar o borrar enteros.
+
+Cada directorio tiene un único escritor por proceso (``get_writer``); el listener de
+``prediction_log`` es quien anexa las predicciones nuevas.
+"""
+import json
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import closing
+from datetime import datetime, timedelta
+
+import numpy as np
+
+import prediction_store
+from predictor_core import FEATURES
+
+
+HISTORY_DIR = 'logs/history'
+SEGMENT_ROWS = 1000000
+IMPORT_MARKER = '.imported'
+IMPORT_PROGRESS = '.import-progress'
+
+COLUMNS = [
+    ('timestamp', np.dtype('<i8')),
+    ('age', np.dtype('u1')),
+    ('study_time_weekly', np.dtype('<f4')),
+    ('absences', np.dtype('u1')),
+    ('gpa', np.dtype('<f4')),
+    ('flags', np.dtype('u1')),
+]
+EXTENSIONS = {np.dtype('<i8'): 'i8', np.dtype('u1'): 'u1', np.dtype('<f4'): 'f4'}
+
+SOURCE_CODES = {prediction_store.SOURCE_STUDENT: 0, prediction_store.SOURCE_COORDINATOR: 1}
+MISSING_UINT8 = 255
+FLAG_FEATURES = FEATURES[3:]
+SOURCE_SHIFT = 5
+RISK_SHIFT = 6
+EPOCH = datetime(1970, 1, 1)
+
+
+def to_micros(timestamp):
+    return (timestamp - EPOCH) // timedelta(microseconds=1)
+
+
+def from_micros(micros):
+    return EPOCH + timedelta(microseconds=int(micros))
+
+
+def _column_path(segment_dir, name, dtype):
+    return os.path.join(segment_dir, f"{name}.{EXTENSIONS[dtype]}")
+
+
+def _segment_dirs(directory):
+    if not os.path.isdir(directory):
+        return []
+    names = sorted(name for name in os.listdir(directory) if name.startswith('seg-'))
+    return [os.path.join(directory, name) for name in names]
+
+
+def _uint8_or_missing(values):
+    values = np.asarray(values, dtype=np.float64)
+    missing = np.isnan(values)
+    return np.where(missing, MISSING_UINT8, np.clip(np.nan_to_num(values), 0, MISSING_UINT8 - 1)).astype(np.uint8)
+
+
+# Convertir predicciones a columnas; features es una matriz (n, 8) en el orden de FEATURES con NaN si falta
+def encode_columns(timestamps, sources, features, gpas, risk_codes):
+    features = np.asarray(features, dtype=np.float64).reshape(-1, len(FEATURES))
+    flags = np.zeros(len(features), dtype=np.uint8)
+    for bit in range(len(FLAG_FEATURES)):
+        flags |= (np.nan_to_num(features[:, 3 + bit]) > 0).astype(np.uint8) << bit
+    flags |= np.asarray([SOURCE_CODES[source] for source in sources], dtype=np.uint8) << SOURCE_SHIFT
+    flags |= (np.asarray(risk_codes, dtype=np.uint8) - 1) << RISK_SHIFT
+    return {
+        'timestamp': np.asarray([to_micros(ts) for ts in timestamps], dtype=np.int64),
+        'age': _uint8_or_missing(features[:, 0]),
+        'study_time_weekly': features[:, 1].astype(np.float32),
+        'absences': _uint8_or_missing(features[:, 2]),
+        'gpa': np.asarray(gpas, dtype=np.float32),
+        'flags': flags,
+    }
+
+
+# Columnas derivadas del byte de indicadores
+def source_codes(columns):
+    return (columns['flags'] >> SOURCE_SHIFT) & 1
+
+
+def risk_codes(columns):
+    return (columns['flags'] >> RISK_SHIFT) + 1
+
+
+def activity_flag(columns, feature):
+    return (columns['flags'] >> FLAG_FEATURES.index(feature)) & 1
+
+
+def _feature_row(student_data):
+    return [np.nan if not student_data or student_data.get(name) is None else float(student_data[name])
+            for name in FEATURES]
+
+
+# Escritor de solo anexado; mantiene abiertos los archivos del segmento actual
+class HistoryWriter:
+    def __init__(self, directory=HISTORY_DIR, segment_rows=SEGMENT_ROWS):
+        self.directory = directory
+        self.segment_rows = segment_rows
+        self.files = None
+        self.segment_dir = None
+        self.segment_count = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _open_segment(self):
+        segments = _segment_dirs(self.directory)
+        if segments:
+            self.segment_dir = segments[-1]
+            self.segment_count = segment_length(self.segment_dir)
+            if self.segment_count >= self.segment_rows:
+                self.segment_dir = None
+        if self.segment_dir is None:
+            # Numeración a partir del último segmento (los antiguos se pueden haber archivado)
+            index = int(os.path.basename(segments[-1])[4:]) + 1 if segments else 0
+            self.segment_dir = os.path.join(self.directory, f"seg-{index:06d}")
+            os.makedirs(self.segment_dir, exist_ok=True)
+            self.segment_count = 0
+
+        # Recortar una escritura a medias (p. ej. si el proceso murió entre dos columnas)
+        self.files = {}
+        for name, dtype in COLUMNS:
+            path = _column_path(self.segment_dir, name, dtype)
+            f = open(path, 'ab')
+            if f.tell() != self.segment_count * dtype.itemsize:
+                f.truncate(self.segment_count * dtype.itemsize)
+            self.files[name] = f
+
+    def _close_segment(self):
+        if self.files is not None:
+            for f in self.files.values():
+                f.close()
+        self.files = None
+        self.segment_dir = None
+
+    # Anexar columnas ya codificadas (ver encode_columns), partiendo entre segmentos si hace falta
+    def append_columns(self, columns):
+        total = len(columns['gpa'])
+        with self._lock:
+            written = 0
+            while written < total:
+                if self.files is None:
+                    self._open_segment()
+                size = min(total - written, self.segment_rows - self.segment_count)
+                for name, dtype in COLUMNS:
+                    self.files[name].write(np.ascontiguousarray(columns[name][written:written + size], dtype=dtype).tobytes())
+                for f in self.files.values():
+                    f.flush()
+                self.segment_count += size
+                written += size
+                if self.segment_count >= self.segment_rows:
+                    self._close_segment()
+
+    def append(self, source, gpa, risk_code, student_data=None, timestamp=None):
+        columns = encode_columns([timestamp or datetime.now()], [source], [_feature_row(student_data)],
+                                 [gpa], [risk_code])
+        self.append_columns(columns)
+
+    # Recortar el historial a sus primeras `rows` filas (deshace un bloque importado a medias)
+    def truncate(self, rows):
+        with self._lock:
+            self._close_segment()
+            remaining = rows
+            for segment_dir in _segment_dirs(self.directory):
+                length = segment_length(segment_dir)
+                if remaining >= length:
+                    remaining -= length
+                elif remaining == 0:
+                    shutil.rmtree(segment_dir)
+                else:
+                    for name, dtype in COLUMNS:
+                        with open(_column_path(segment_dir, name, dtype), 'r+b') as f:
+                            f.truncate(remaining * dtype.itemsize)
+                    remaining = 0
+
+    def close(self):
+        with self._lock:
+            self._close_segment()
+
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+# Escritor compartido del proceso para un directorio (solo puede haber uno por directorio)
+def get_writer(directory=HISTORY_DIR):
+    key = os.path.abspath(directory)
+    with _writers_lock:
+        if key not in _writers:
+            _writers[key] = HistoryWriter(directory)
+        return _writers[key]
+
+
+# Filas completas de un segmento (la columna más corta manda si hay una escritura en curso)
+def segment_length(segment_dir):
+    lengths = []
+    for name, dtype in COLUMNS:
+        path = _column_path(segment_dir, name, dtype)
+        lengths.append(os.path.getsize(path) // dtype.itemsize if os.path.exists(path) else 0)
+    return min(lengths)
+
+
+# Columnas de un segmento mapeadas en memoria (sin copiar)
+def read_segment(segment_dir):
+    length = segment_length(segment_dir)
+    if length == 0:
+        return None
+    return {
+        name: np.memmap(_column_path(segment_dir, name, dtype), dtype=dtype, mode='r', shape=(length,))
+        for name, dtype in COLUMNS
+    }
+
+
+def iter_segments(directory=HISTORY_DIR):
+    for segment_dir in _segment_dirs(directory):
+        columns = read_segment(segment_dir)
+        if columns is not None:
+            yield columns
+
+
+# Todo el historial como arreglos (concatena los segmentos, así que aquí sí se copia)
+def read_history(directory=HISTORY_DIR):
+    segments = list(iter_segments(directory))
+    if not segments:
+        return {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS}
+    return {name: np.concatenate([segment[name] for segment in segments]) for name, _ in COLUMNS}
+
+
+def history_rows(directory=HISTORY_DIR):
+    return sum(segment_length(segment_dir) for segment_dir in _segment_dirs(directory))
+
+
+def history_bytes(directory=HISTORY_DIR):
+    total = 0
+    for segment_dir in _segment_dirs(directory):
+        total += sum(os.path.getsize(os.path.join(segment_dir, name)) for name in os.listdir(segment_dir))
+    return total
+
+
+# Qué valores del byte de indicadores cumplen los filtros de origen y nivel (tabla de 256 entradas)
+def _flags_lookup(source, risk_codes):
+    values = np.arange(256, dtype=np.uint8)
+    allowed = np.ones(256, dtype=bool)
+    if source is not None:
+        allowed &= ((values >> SOURCE_SHIFT) & 1) == SOURCE_CODES[source]
+    if risk_codes:
+        allowed &= np.isin((values >> RISK_SHIFT) + 1, list(risk_codes))
+    return allowed
+
+
+def _filter_mask(columns, source=prediction_store.SOURCE_STUDENT, risk_codes=None, min_gpa=None, max_gpa=None,
+                 start=None, end=None):
+    mask = _flags_lookup(source, risk_codes)[columns['flags']]
+    if min_gpa is not None:
+        mask &= columns['gpa'] >= min_gpa
+    if max_gpa is not None:
+        mask &= columns['gpa'] < max_gpa
+    if start is not None:
+        mask &= columns['timestamp'] >= to_micros(start)
+    if end is not None:
+        mask &= columns['timestamp'] < to_micros(end)
+    return mask
+
+
+# Mismo resumen que prediction_store.risk_summary, recorriendo las columnas
+def risk_summary(directory=HISTORY_DIR, **filters):
+    tier_counts = np.zeros(5, dtype=np.int64)
+    gpa_sum = 0.0
+    for columns in iter_segments(directory):
+        mask = _filter_mask(columns, **filters)
+        tier_counts += np.bincount(risk_codes(columns)[mask], minlength=5)
+        gpa_sum += float(columns['gpa'][mask].sum(dtype=np.float64))
+
+    total = int(tier_counts.sum())
+    return {
+        'total': total,
+        'high_risk': int(tier_counts[4]),
+        'medium_risk': int(tier_counts[3]),
+        'avg_gpa': gpa_sum / total if total else None,
+        'by_risk_code': {code: int(count) for code, count in enumerate(tier_counts) if count},
+    }
+
+
+def _read_progress(directory):
+    try:
+        with open(os.path.join(directory, IMPORT_PROGRESS), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _write_progress(directory, progress):
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(progress, f)
+    os.replace(tmp_path, os.path.join(directory, IMPORT_PROGRESS))
+
+
+# Copiar una sola vez al historial las predicciones que ya están en el almacén SQLite.
+# El avance (último id copiado y filas del historial) se guarda después de cada bloque:
+# si el proceso muere a mitad, se recorta el bloque incompleto y se sigue desde ahí
+def import_store(db_path=prediction_store.DB_PATH, directory=HISTORY_DIR, chunk_size=50000):
+    marker = os.path.join(directory, IMPORT_MARKER)
+    if os.path.exists(marker):
+        return 0
+    if not os.path.exists(db_path):
+        # Arranque sin almacén (p. ej. un campus nuevo): no hay nada que copiar, y a partir de
+        # aquí el listener escribe cada predicción en el almacén y en el historial
+        os.makedirs(directory, exist_ok=True)
+        with open(marker, 'w', encoding='utf-8') as f:
+            f.write(f"{datetime.now().isoformat(sep=' ')} 0\n")
+        return 0
+
+    writer = get_writer(directory)
+    imported = 0
+    columns = ['id', 'timestamp', 'source', *prediction_store.FEATURE_COLUMNS, 'gpa', 'risk_code']
+    with closing(prediction_store.connect(db_path)) as conn:
+        progress = _read_progress(directory)
+        if progress is None:
+            # Solo las filas que ya existían; las nuevas llegan por el listener de prediction_log
+            max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM predictions").fetchone()[0]
+            progress = {'last_id': 0, 'max_id': max_id, 'rows': history_rows(directory)}
+            _write_progress(directory, progress)
+        elif history_rows(directory) > progress['rows']:
+            writer.truncate(progress['rows'])
+
+        while True:
+            rows = conn.execute(
+                f"SELECT {', '.join(columns)} FROM predictions WHERE id > ? AND id <= ? ORDER BY id LIMIT ?",
+                (progress['last_id'], progress['max_id'], chunk_size),
+            ).fetchall()
+            if not rows:
+                break
+            features = np.array([[np.nan if row[name] is None else row[name] for name in prediction_store.FEATURE_COLUMNS]
+                                 for row in rows], dtype=np.float64)
+            writer.append_columns(encode_columns(
+                [datetime.fromisoformat(row['timestamp']) for row in rows],
+                [row['source'] for row in rows], features,
+                [row['gpa'] for row in rows], [row['risk_code'] for row in rows],
+            ))
+            progress = {**progress, 'last_id': rows[-1]['id'], 'rows': progress['rows'] + len(rows)}
+            _write_progress(directory, progress)
+            imported += len(rows)
+
+    with open(marker, 'w', encoding='utf-8') as f:
+        f.write(f"{datetime.now().isoformat(sep=' ')} {imported}\n")
+    os.remove(os.path.join(directory, IMPORT_PROGRESS))
+    return imported
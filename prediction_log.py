@@ -0,0 +1,231 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+import prediction_history
+import prediction_store
+from predictor_core import FEATURES
+
+
+EVENT_LOG_PATH = 'logs/predictions.jsonl'
+SCHEMA_VERSION = 2
+
+
+# Una línea JSON por evento de predicción
+class JsonLinesFormatter(logging.Formatter):
+    def format(self, record):
+        return json.dumps(record.event, ensure_ascii=False, separators=(',', ':'))
+
+
+# Archivo rotativo por tamaño o por tiempo que hace fsync por lotes (cada N eventos o cada
+# T segundos; un hilo aparte sincroniza el final de una ráfaga aunque no lleguen más eventos)
+class FsyncRotatingFileHandler(RotatingFileHandler):
+    def __init__(self, filename, fsync_every=100, fsync_interval=1.0, rotate_interval=24 * 3600, **kwargs):
+        super().__init__(filename, encoding='utf-8', **kwargs)
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.rotate_interval = rotate_interval
+        self._pending = 0
+        self._last_fsync = time.monotonic()
+        # Periodo (p. ej. día local) al que pertenece el archivo actual, según su última escritura
+        self._period = self._period_of(os.path.getmtime(self.baseFilename)
+                                       if os.path.exists(self.baseFilename) else time.time())
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name='prediction-log-fsync', daemon=True)
+        self._flusher.start()
+
+    # Periodos alineados a la medianoche local
+    def _period_of(self, timestamp):
+        if not self.rotate_interval:
+            return 0
+        return int((timestamp + time.localtime(timestamp).tm_gmtoff) // self.rotate_interval)
+
+    def shouldRollover(self, record):
+        if self.rotate_interval and self._period_of(time.time()) != self._period:
+            return True
+        return super().shouldRollover(record)
+
+    def emit(self, record):
+        super().emit(record)
+        self._pending += 1
+        if self._pending >= self.fsync_every or time.monotonic() - self._last_fsync >= self.fsync_interval:
+            self._fsync()
+
+    def _fsync(self):
+        if self.stream is not None:
+            self.stream.flush()
+            os.fsync(self.stream.fileno())
+        self._pending = 0
+        self._last_fsync = time.monotonic()
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.fsync_interval):
+            self.acquire()
+            try:
+                if self._pending and time.monotonic() - self._last_fsync >= self.fsync_interval:
+                    self._fsync()
+            except Exception:
+                pass
+            finally:
+                self.release()
+
+    def doRollover(self):
+        self._fsync()
+        super().doRollover()
+        self._period = self._period_of(time.time())
+
+    def close(self):
+        self._stop.set()
+        if self._flusher.is_alive() and self._flusher is not threading.current_thread():
+            self._flusher.join()
+        self.acquire()
+        try:
+            if self._pending:
+                self._fsync()
+        finally:
+            self.release()
+        super().close()
+
+
+# Listener que se puede detener más de una vez (manualmente y en atexit). Cuando la cola
+# queda vacía pide a los manejadores que escriban lo acumulado: en una ráfaga cada lote
+# drenado se guarda de una vez y, en reposo, cada evento se guarda al llegar
+class PredictionLogListener(QueueListener):
+    def handle(self, record):
+        super().handle(record)
+        if self.queue.empty():
+            self.flush()
+
+    def flush(self):
+        for handler in self.handlers:
+            handler.flush()
+
+    def stop(self):
+        if self._thread is not None:
+            super().stop()
+            self.flush()
+
+
+# Copia los eventos al almacén SQLite, también fuera del hilo de la petición. Mantiene una
+# conexión abierta y guarda cada lote con un solo executemany y un solo commit (al vaciarse
+# la cola o cada flush_every eventos)
+class PredictionStoreHandler(logging.Handler):
+    def __init__(self, db_path=prediction_store.DB_PATH, flush_every=500):
+        super().__init__()
+        self.db_path = db_path
+        self.flush_every = flush_every
+        self._pending = []
+        self._last_record = None
+        self._conn = None
+
+    def emit(self, record):
+        event = record.event
+        try:
+            self._pending.append((event['source'], event['gpa'], event['features'], event['student_id'],
+                                  datetime.fromisoformat(event['timestamp'])))
+            self._last_record = record
+        except Exception:
+            self.handleError(record)
+            return
+        if len(self._pending) >= self.flush_every:
+            self._write()
+
+    def _write(self):
+        predictions, self._pending = self._pending, []
+        if not predictions:
+            return
+        try:
+            if self._conn is None:
+                self._conn = prediction_store.connect(self.db_path, check_same_thread=False)
+            prediction_store.record_predictions(self._conn, predictions)
+        except Exception:
+            self.handleError(self._last_record)
+
+    def flush(self):
+        self.acquire()
+        try:
+            self._write()
+        finally:
+            self.release()
+
+    def close(self):
+        self.acquire()
+        try:
+            self._write()
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+        finally:
+            self.release()
+        super().close()
+
+
+# Anexa cada evento al historial en columnas binarias (ver prediction_history)
+class PredictionHistoryHandler(logging.Handler):
+    def __init__(self, directory=prediction_history.HISTORY_DIR):
+        super().__init__()
+        self.writer = prediction_history.get_writer(directory)
+
+    def emit(self, record):
+        event = record.event
+        try:
+            self.writer.append(event['source'], event['gpa'], event['risk_code'], event['features'],
+                               timestamp=datetime.fromisoformat(event['timestamp']))
+        except Exception:
+            self.handleError(record)
+
+
+# Crear el logger de predicciones con su escritor en segundo plano
+def start_prediction_log(path=EVENT_LOG_PATH, db_path=prediction_store.DB_PATH,
+                         history_dir=prediction_history.HISTORY_DIR,
+                         max_bytes=50 * 1024 * 1024, backup_count=10, rotate_interval=24 * 3600):
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+
+    file_handler = FsyncRotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count,
+                                            rotate_interval=rotate_interval)
+    file_handler.setFormatter(JsonLinesFormatter())
+
+    event_queue = queue.SimpleQueue()
+    listener = PredictionLogListener(event_queue, file_handler, PredictionStoreHandler(db_path),
+                                     PredictionHistoryHandler(history_dir))
+    listener.start()
+    atexit.register(listener.stop)
+
+    event_logger = logging.getLogger(f"predictions.{os.path.abspath(path)}")
+    event_logger.setLevel(logging.INFO)
+    event_logger.propagate = False
+    for handler in list(event_logger.handlers):
+        event_logger.removeHandler(handler)
+    event_logger.addHandler(QueueHandler(event_queue))
+    return event_logger, listener
+
+
+# Registrar una predicción (solo encola; la escritura a disco ocurre en otro hilo)
+def log_prediction(event_logger, source, gpa, risk_code, student_data, student_id=None, model_version=None):
+    event = {
+        'schema_version': SCHEMA_VERSION,
+        'timestamp': datetime.now().isoformat(),
+        'source': source,
+        'student_id': student_id or None,
+        'features': {name: student_data.get(name) for name in FEATURES},
+        'gpa': float(gpa),
+        'risk_code': int(risk_code),
+        'model_version': model_version,
+    }
+    event_logger.info("prediction", extra={'event': event})
+
+
+# Leer los eventos de un archivo JSON Lines
+def read_events(path=EVENT_LOG_PATH):
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
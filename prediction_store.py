@@ -0,0 +1,278 @@
+import ast
+import csv
+import io
+import os
+import sqlite3
+import threading
+from contextlib import closing
+from datetime import datetime
+
+from predictor_core import FEATURES, get_risk_level
+
+
+DB_PATH = 'logs/predictions.db'
+
+# Orígenes de las predicciones guardadas
+SOURCE_STUDENT = 'estudiante'
+SOURCE_COORDINATOR = 'coordinador'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    source TEXT NOT NULL,
+    student_id TEXT,
+    age INTEGER,
+    study_time_weekly REAL,
+    absences INTEGER,
+    tutoring INTEGER,
+    extracurricular INTEGER,
+    sports INTEGER,
+    music INTEGER,
+    volunteering INTEGER,
+    gpa REAL NOT NULL,
+    risk_code INTEGER NOT NULL
+);
+-- (source, gpa, id) da el orden de la lista de riesgo sin ordenar en memoria; risk_code al final
+-- mantiene los resúmenes sobre el índice. Reemplaza al índice anterior (source, gpa, risk_code)
+DROP INDEX IF EXISTS idx_predictions_source_gpa;
+CREATE INDEX IF NOT EXISTS idx_predictions_source_gpa_id ON predictions (source, gpa, id, risk_code);
+CREATE INDEX IF NOT EXISTS idx_predictions_risk_gpa ON predictions (risk_code, gpa);
+CREATE INDEX IF NOT EXISTS idx_predictions_timestamp ON predictions (timestamp);
+CREATE TABLE IF NOT EXISTS metadata (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Columnas de la tabla en el mismo orden que FEATURES
+FEATURE_COLUMNS = ['age', 'study_time_weekly', 'absences', 'tutoring',
+                   'extracurricular', 'sports', 'music', 'volunteering']
+
+INSERT_SQL = (
+    f"INSERT INTO predictions (timestamp, source, student_id, {', '.join(FEATURE_COLUMNS)}, gpa, risk_code) "
+    f"VALUES ({', '.join(['?'] * (len(FEATURE_COLUMNS) + 5))})"
+)
+
+
+# Bases cuyo esquema ya se creó en este proceso (el modo WAL queda guardado en el archivo)
+_initialized = set()
+_initialized_lock = threading.Lock()
+
+
+# Abrir conexión; el esquema se crea una vez por archivo y proceso, no en cada consulta
+def connect(db_path=DB_PATH, check_same_thread=True):
+    directory = os.path.dirname(db_path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+
+    key = os.path.abspath(db_path)
+    exists = os.path.exists(db_path)
+    conn = sqlite3.connect(db_path, timeout=10, check_same_thread=check_same_thread)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA synchronous=NORMAL")
+    if key not in _initialized or not exists:
+        with _initialized_lock:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            _initialized.add(key)
+    return conn
+
+
+def _prediction_row(source, gpa, student_data=None, student_id=None, timestamp=None):
+    timestamp = timestamp or datetime.now()
+    features = [student_data.get(name) if student_data else None for name in FEATURES]
+    _, risk_code = get_risk_level(gpa)
+    return (timestamp.isoformat(sep=' '), source, student_id, *features, float(gpa), risk_code)
+
+
+# Guardar una predicción
+def record_prediction(source, gpa, student_data=None, student_id=None, timestamp=None, db_path=DB_PATH):
+    row = _prediction_row(source, gpa, student_data, student_id, timestamp)
+    with closing(connect(db_path)) as conn, conn:
+        conn.execute(INSERT_SQL, row)
+
+
+# Guardar varias predicciones en una sola transacción sobre una conexión abierta
+# (cada predicción: (source, gpa, student_data, student_id, timestamp))
+def record_predictions(conn, predictions):
+    rows = [_prediction_row(*prediction) for prediction in predictions]
+    with conn:
+        conn.executemany(INSERT_SQL, rows)
+
+
+# Contar predicciones por origen
+def count_by_source(db_path=DB_PATH):
+    with closing(connect(db_path)) as conn:
+        rows = conn.execute("SELECT source, COUNT(*) AS total FROM predictions GROUP BY source").fetchall()
+    return {row['source']: row['total'] for row in rows}
+
+
+# Contador incremental por origen: cada consulta solo lee las filas nuevas
+class SourceCounter:
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self.last_id = 0
+        self.counts = {}
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        with self._lock, closing(connect(self.db_path)) as conn:
+            max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM predictions").fetchone()[0]
+
+            # La base fue vaciada o recreada: volver a contar desde cero
+            if max_id < self.last_id:
+                self.last_id = 0
+                self.counts = {}
+
+            rows = conn.execute(
+                "SELECT source, COUNT(*) AS total FROM predictions WHERE id > ? AND id <= ? GROUP BY source",
+                (self.last_id, max_id),
+            ).fetchall()
+            for row in rows:
+                self.counts[row['source']] = self.counts.get(row['source'], 0) + row['total']
+            self.last_id = max_id
+            return dict(self.counts)
+
+
+# Construir el WHERE para los filtros de la lista de riesgo
+def _filter_clause(source=SOURCE_STUDENT, risk_codes=None, min_gpa=None, max_gpa=None, start=None, end=None):
+    conditions, params = [], []
+    if source is not None:
+        conditions.append("source = ?")
+        params.append(source)
+    if risk_codes:
+        conditions.append(f"risk_code IN ({', '.join(['?'] * len(risk_codes))})")
+        params.extend(risk_codes)
+    if min_gpa is not None:
+        conditions.append("gpa >= ?")
+        params.append(min_gpa)
+    if max_gpa is not None:
+        conditions.append("gpa < ?")
+        params.append(max_gpa)
+    if start is not None:
+        conditions.append("timestamp >= ?")
+        params.append(start.isoformat(sep=' '))
+    if end is not None:
+        conditions.append("timestamp < ?")
+        params.append(end.isoformat(sep=' '))
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return where, params
+
+
+# Resumen de las predicciones que cumplen los filtros
+def risk_summary(db_path=DB_PATH, **filters):
+    where, params = _filter_clause(**filters)
+    with closing(connect(db_path)) as conn:
+        row = conn.execute(
+            f"""
+            SELECT COUNT(*) AS total,
+                   SUM(CASE WHEN risk_code = 4 THEN 1 ELSE 0 END) AS high_risk,
+                   SUM(CASE WHEN risk_code = 3 THEN 1 ELSE 0 END) AS medium_risk,
+                   AVG(gpa) AS avg_gpa
+            FROM predictions
+            {where}
+            """,
+            params,
+        ).fetchone()
+    return {
+        'total': row['total'],
+        'high_risk': row['high_risk'] or 0,
+        'medium_risk': row['medium_risk'] or 0,
+        'avg_gpa': row['avg_gpa'],
+    }
+
+
+# Una página de estudiantes ordenados por GPA (menor primero), resuelta con el índice
+def fetch_risk_students(limit=None, offset=0, db_path=DB_PATH, **filters):
+    where, params = _filter_clause(**filters)
+    query = (
+        f"SELECT id, timestamp, student_id, {', '.join(FEATURE_COLUMNS)}, gpa, risk_code "
+        f"FROM predictions {where} ORDER BY gpa, id"
+    )
+    if limit is not None:
+        query += " LIMIT ? OFFSET ?"
+        params.extend([limit, offset])
+
+    with closing(connect(db_path)) as conn:
+        rows = conn.execute(query, params).fetchall()
+
+    students = []
+    for row in rows:
+        students.append({
+            'timestamp': row['timestamp'],
+            'student_id': row['student_id'],
+            'GPA': row['gpa'],
+            'risk_code': row['risk_code'],
+            'Datos': {name: row[column] for name, column in zip(FEATURES, FEATURE_COLUMNS)},
+        })
+    return students
+
+
+# Exportar a CSV por bloques de filas, sin cargar todo el resultado en memoria
+def iter_risk_csv(chunk_size=5000, db_path=DB_PATH, **filters):
+    where, params = _filter_clause(**filters)
+    columns = ['timestamp', 'student_id', *FEATURE_COLUMNS, 'gpa', 'risk_code']
+    header = ['timestamp', 'StudentID', *FEATURES, 'GPA', 'risk_code']
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    yield buffer.getvalue()
+
+    with closing(connect(db_path)) as conn:
+        cursor = conn.execute(
+            f"SELECT {', '.join(columns)} FROM predictions {where} ORDER BY gpa, id", params
+        )
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(tuple(row) for row in rows)
+            yield buffer.getvalue()
+
+
+def _parse_log_line(line):
+    timestamp = datetime.strptime(line[:23], '%Y-%m-%d %H:%M:%S,%f')
+
+    if 'Predicción estudiante - GPA:' in line:
+        gpa = float(line.split('GPA: ')[1].split(',')[0].strip())
+        student_data = ast.literal_eval(line.split('Datos:')[1].strip())
+        return _prediction_row(SOURCE_STUDENT, gpa, student_data, timestamp=timestamp)
+
+    if 'Predicción coordinador - Estudiante:' in line:
+        details = line.split('Estudiante:')[1]
+        student_id, gpa = details.rsplit(', GPA: ', 1)
+        return _prediction_row(SOURCE_COORDINATOR, float(gpa.strip()), student_id=student_id.strip(),
+                               timestamp=timestamp)
+
+    return None
+
+
+# Importar una sola vez las predicciones registradas en un app.log existente
+def import_log_file(log_path='logs/app.log', db_path=DB_PATH):
+    if not os.path.exists(log_path):
+        return 0
+
+    import_key = f"imported:{os.path.abspath(log_path)}"
+    with closing(connect(db_path)) as conn:
+        if conn.execute("SELECT 1 FROM metadata WHERE key = ?", (import_key,)).fetchone():
+            return 0
+
+        rows = []
+        with open(log_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    row = _parse_log_line(line)
+                except (ValueError, IndexError, SyntaxError):
+                    continue
+                if row is not None:
+                    rows.append(row)
+
+        with conn:
+            conn.executemany(INSERT_SQL, rows)
+            conn.execute("INSERT INTO metadata (key, value) VALUES (?, ?)",
+                         (import_key, datetime.now().isoformat(sep=' ')))
+    return len(rows)
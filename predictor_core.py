@@ -0,0 +1,239 @@
+import hashlib
+import operator
+
+import numpy as np
+import pandas as pd
+
+
+# Orden fijo de las características que espera el modelo
+FEATURES = ['Age', 'StudyTimeWeekly', 'Absences', 'Tutoring',
+            'Extracurricular', 'Sports', 'Music', 'Volunteering']
+
+# Niveles de riesgo: (límite superior exclusivo de GPA, etiqueta, código)
+RISK_TIERS = [
+    (2.0, "🔴 ALTO RIESGO", 4),
+    (3.0, "🟡 RIESGO MODERADO", 3),
+    (3.7, "🟢 BAJO RIESGO", 2),
+    (np.inf, "✅ EXCELENTE", 1),
+]
+RISK_THRESHOLDS = np.array([limit for limit, _, _ in RISK_TIERS[:-1]])
+RISK_CODES = np.array([code for _, _, code in RISK_TIERS])
+RISK_LABELS = {code: label for _, label, code in RISK_TIERS}
+
+NO_ACTIVITIES = [('Extracurricular', '==', 0), ('Sports', '==', 0), ('Music', '==', 0), ('Volunteering', '==', 0)]
+
+# Reglas de recomendación en orden de presentación:
+# (código, nivel de riesgo al que aplica, condiciones que deben cumplirse todas, texto)
+RECOMMENDATION_RULES = [
+    ('HIGH_HEADER', 4, [], "🔴 **Intervención urgente necesaria**"),
+    ('HIGH_TUTORING_INTENSIVE', 4, [], "• Programa de tutorías intensivas (3+ sesiones semanales)"),
+    ('HIGH_COORDINATOR_MEETING', 4, [], "• Reunión con el coordinador académico esta semana"),
+    ('HIGH_STUDY_PLAN_REVIEW', 4, [], "• Revisión del plan de estudio y técnicas de aprendizaje"),
+    ('HIGH_EXTERNAL_FACTORS', 4, [], "• Evaluación de posibles problemas externos que afecten el rendimiento"),
+    ('HIGH_STUDY_TIME', 4, [('StudyTimeWeekly', '<', 10)], "• Incrementar tiempo de estudio a mínimo 15 horas semanales"),
+    ('HIGH_ABSENCES', 4, [('Absences', '>', 10)], "• Control de asistencia y plan para reducir faltas"),
+    ('HIGH_JOIN_TUTORING', 4, [('Tutoring', '==', 0)], "• Inscribirse inmediatamente en el programa de tutorías"),
+
+    ('MODERATE_HEADER', 3, [], "🟡 **Intervención preventiva recomendada**"),
+    ('MODERATE_TUTORING', 3, [], "• Participación en tutorías (2 sesiones semanales)"),
+    ('MODERATE_STUDY_WORKSHOPS', 3, [], "• Talleres de técnicas de estudio y gestión del tiempo"),
+    ('MODERATE_SUBJECT_REVIEW', 3, [], "• Revisión de materias con mayor dificultad"),
+    ('MODERATE_STUDY_TIME', 3, [('StudyTimeWeekly', '<', 15)], "• Aumentar tiempo de estudio a 15-20 horas semanales"),
+    ('MODERATE_ACTIVITIES', 3, NO_ACTIVITIES,
+     "• Considerar participar en alguna actividad extracurricular para mejorar el equilibrio"),
+
+    ('LOW_HEADER', 2, [], "🟢 **Rendimiento satisfactorio**"),
+    ('LOW_KEEP_HABITS', 2, [], "• Mantener buenos hábitos de estudio"),
+    ('LOW_IMPROVEMENT_AREAS', 2, [], "• Identificar áreas de mejora para alcanzar excelencia"),
+    ('LOW_MENTOR_OTHERS', 2, [], "• Considerar mentoría para estudiantes con mayor dificultad"),
+    ('LOW_STUDY_EFFICIENCY', 2, [('StudyTimeWeekly', '>', 25)], "• Evaluar técnicas de estudio para mejorar eficiencia"),
+
+    ('EXCELLENT_HEADER', 1, [], "✅ **Rendimiento sobresaliente**"),
+    ('EXCELLENT_HONORS', 1, [], "• Considerar programas de honores o investigación"),
+    ('EXCELLENT_MENTORING', 1, [], "• Mentoría para otros estudiantes"),
+    ('EXCELLENT_LEADERSHIP', 1, [], "• Explorar oportunidades de liderazgo académico"),
+    ('EXCELLENT_CONFERENCES', 1, [], "• Participar en conferencias o competencias académicas"),
+]
+RULE_CODES = [code for code, _, _, _ in RECOMMENDATION_RULES]
+RULE_TEXTS = np.array([text for _, _, _, text in RECOMMENDATION_RULES], dtype=object)
+
+CONDITION_OPERATORS = {'<': operator.lt, '>': operator.gt, '==': operator.eq}
+
+# Determinar nivel de riesgo
+def get_risk_level(gpa):
+    for limit, label, code in RISK_TIERS:
+        if gpa < limit:
+            return label, code
+    return RISK_TIERS[-1][1], RISK_TIERS[-1][2]
+
+# Obtener recomendaciones según GPA
+def get_recommendations(gpa, student_data):
+    _, risk_code = get_risk_level(gpa)
+    return [
+        text for _, rule_risk, conditions, text in RECOMMENDATION_RULES
+        if rule_risk == risk_code and all(
+            CONDITION_OPERATORS[op](student_data[feature], value) for feature, op, value in conditions
+        )
+    ]
+
+# Nivel de riesgo de muchos estudiantes a la vez
+def risk_codes_batch(gpas):
+    return RISK_CODES[np.searchsorted(RISK_THRESHOLDS, np.asarray(gpas, dtype=np.float64), side='right')]
+
+# Evaluar todas las reglas sobre un lote con máscaras; devuelve (códigos de riesgo, matriz filas x reglas)
+def evaluate_rules_batch(gpas, features):
+    if isinstance(features, pd.DataFrame):
+        columns = {name: features[name].to_numpy() for name in FEATURES}
+    else:
+        features = np.asarray(features)
+        columns = {name: features[:, i] for i, name in enumerate(FEATURES)}
+
+    risk_codes = risk_codes_batch(gpas)
+    fired = np.empty((len(risk_codes), len(RECOMMENDATION_RULES)), dtype=bool)
+    for j, (_, rule_risk, conditions, _) in enumerate(RECOMMENDATION_RULES):
+        mask = risk_codes == rule_risk
+        for feature, op, value in conditions:
+            mask &= CONDITION_OPERATORS[op](columns[feature], value)
+        fired[:, j] = mask
+    return risk_codes, fired
+
+# Unir los textos de las reglas activas por fila (una vez por combinación distinta de reglas)
+def join_recommendations(fired, separator=" | "):
+    bits = np.left_shift(1, np.arange(fired.shape[1], dtype=np.int64))
+    keys, first_rows, inverse = np.unique(fired @ bits, return_index=True, return_inverse=True)
+    joined = np.array([separator.join(RULE_TEXTS[fired[row]]) for row in first_rows], dtype=object)
+    return joined[inverse.ravel()]
+
+# Huella SHA-256 de un archivo (identifica la versión del modelo cargado)
+def file_checksum(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+# Estimadores con enlace identidad (predict = X @ coef + intercept). Los GLM como
+# PoissonRegressor/GammaRegressor/TweedieRegressor aplican una función de enlace y no entran
+IDENTITY_LINK_ESTIMATORS = {
+    'LinearRegression', 'Ridge', 'RidgeCV', 'Lasso', 'LassoCV', 'ElasticNet', 'ElasticNetCV',
+    'SGDRegressor', 'HuberRegressor', 'LinearSVR', 'SVR',
+}
+
+# Filas de prueba para comparar los pesos extraídos con model.predict (rangos del formulario)
+def _probe_batch(rows=64, seed=0):
+    rng = np.random.default_rng(seed)
+    probe = np.column_stack([
+        rng.integers(15, 26, rows),
+        rng.choice(np.arange(0, 40.5, 0.5), rows),
+        rng.integers(0, 31, rows),
+        rng.integers(0, 2, (rows, len(FEATURES) - 3)),
+    ]).astype(np.float64)
+    return pd.DataFrame(probe, columns=FEATURES)
+
+def _weights_match(model, coef, intercept, rtol=1e-6, atol=1e-6):
+    probe = _probe_batch()
+    try:
+        expected = np.asarray(model.predict(probe), dtype=np.float64).ravel()
+    except Exception:
+        return False
+    return np.allclose(probe.to_numpy() @ coef + intercept, expected, rtol=rtol, atol=atol)
+
+# Extraer coeficientes e intercepto de modelos lineales (opcionalmente con StandardScaler)
+def extract_linear_weights(model):
+    steps = [step for _, step in model.steps] if hasattr(model, 'steps') else [model]
+    estimator = steps[-1]
+
+    module = type(estimator).__module__
+    name = type(estimator).__name__
+    if not (module.startswith('sklearn.linear_model') or module.startswith('sklearn.svm')):
+        return None
+    if name not in IDENTITY_LINK_ESTIMATORS or (name == 'SVR' and estimator.kernel != 'linear'):
+        return None
+    try:
+        coef = np.asarray(estimator.coef_, dtype=np.float64).ravel()
+        intercept = float(np.asarray(estimator.intercept_, dtype=np.float64).ravel()[0])
+    except (AttributeError, ValueError, IndexError):
+        return None
+    if coef.shape != (len(FEATURES),):
+        return None
+
+    feature_names = getattr(model, 'feature_names_in_', None)
+    if feature_names is not None and list(feature_names) != FEATURES:
+        return None
+
+    # Integrar los escaladores previos en los pesos: w' = w / scale, b' = b - sum(w * mean / scale)
+    for step in reversed(steps[:-1]):
+        if type(step).__name__ != 'StandardScaler':
+            return None
+        scale = step.scale_ if step.with_std and step.scale_ is not None else np.ones_like(coef)
+        mean = step.mean_ if step.with_mean and step.mean_ is not None else np.zeros_like(coef)
+        coef = coef / scale
+        intercept -= float(np.dot(coef, mean))
+
+    # Cualquier caso no contemplado (p. ej. un estimador con predict propio) usa model.predict
+    if not _weights_match(model, coef, intercept):
+        return None
+    return coef, intercept
+
+# Motor de inferencia: producto punto directo para modelos lineales, sklearn para el resto
+class InferenceEngine:
+    def __init__(self, model, version=None):
+        self.model = model
+        self.version = version
+        weights = extract_linear_weights(model)
+        self.is_linear = weights is not None
+        if self.is_linear:
+            self.coef, self.intercept = weights
+            self._weights = tuple(self.coef.tolist())
+
+    # Predicción de un solo estudiante (lista en el orden de FEATURES)
+    def predict_one(self, row):
+        if self.is_linear:
+            return self.intercept + sum(map(operator.mul, self._weights, row))
+        return float(self.model.predict(pd.DataFrame([row], columns=FEATURES))[0])
+
+    # Predicción por lote (DataFrame con las columnas de FEATURES o matriz n x 8)
+    def predict(self, X):
+        if self.is_linear:
+            if isinstance(X, pd.DataFrame):
+                X = X[FEATURES].to_numpy(dtype=np.float64)
+            X = np.ascontiguousarray(X, dtype=np.float64)
+            return X @ self.coef + self.intercept
+        if not isinstance(X, pd.DataFrame):
+            X = pd.DataFrame(X, columns=FEATURES)
+        return self.model.predict(X)
+
+# Validar que el CSV de la cohorte tenga las columnas del modelo
+def validate_cohort(df, first_row=0):
+    missing = [col for col in FEATURES if col not in df.columns]
+    if missing:
+        raise ValueError(f"Faltan columnas requeridas: {', '.join(missing)}")
+
+    features = df[FEATURES].apply(pd.to_numeric, errors='coerce')
+    invalid_rows = features.isnull().any(axis=1)
+    if invalid_rows.any():
+        first_rows = [str(first_row + i + 2) for i in np.flatnonzero(invalid_rows.to_numpy())[:5]]
+        raise ValueError(
+            f"{int(invalid_rows.sum())} filas tienen valores vacíos o no numéricos "
+            f"(por ejemplo, filas {', '.join(first_rows)} del CSV)"
+        )
+    return features.astype(np.float64)
+
+# Puntuar una cohorte completa con predicciones vectorizadas por bloques
+# (first_row: posición de df dentro del archivo, para los mensajes de error al leer por bloques)
+def score_cohort(df, model, chunk_size=10000, first_row=0):
+    features = validate_cohort(df, first_row)
+
+    predictions = np.empty(len(features), dtype=np.float64)
+    for start in range(0, len(features), chunk_size):
+        chunk = features.iloc[start:start + chunk_size]
+        predictions[start:start + chunk_size] = model.predict(chunk)
+
+    risk_codes, fired = evaluate_rules_batch(predictions, features)
+
+    scored = df.copy()
+    scored['GPA_Predicho'] = predictions.round(2)
+    scored['NivelRiesgo'] = pd.Series(risk_codes).map(RISK_LABELS).to_numpy()
+    scored['CodigoRiesgo'] = risk_codes
+    scored['Recomendaciones'] = join_recommendations(fired)
+    return scored
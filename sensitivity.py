@@ -0,0 +1,86 @@
+import numpy as np
+
+from predictor_core import FEATURES, RISK_LABELS, risk_codes_batch
+
+
+# Ejes de la rejilla contrafactual (mismos rangos que el formulario)
+STUDY_TIMES = np.arange(0.0, 40.5, 0.5)
+ABSENCES = np.arange(0, 31)
+TUTORING = np.array([0, 1])
+
+# Costo relativo de cada intervención: por hora semanal de estudio extra, por ausencia
+# menos y por inscribir al estudiante en tutorías
+INTERVENTION_COSTS = {'StudyTimeWeekly': 1.0, 'Absences': 1.5, 'Tutoring': 4.0}
+
+_STUDY, _ABSENCES, _TUTORING = (FEATURES.index(name) for name in ('StudyTimeWeekly', 'Absences', 'Tutoring'))
+
+
+# GPA predicho para cada combinación (tutoría x horas de estudio x ausencias), resto de datos fijos
+def counterfactual_grid(engine, row, study_times=STUDY_TIMES, absences=ABSENCES, tutoring=TUTORING):
+    row = np.asarray(row, dtype=np.float64)
+
+    if engine.is_linear:
+        # Forma cerrada: GPA base más el aporte de cada eje, sumado por broadcasting
+        base = engine.intercept + float(np.dot(engine.coef, row)) - (
+            engine.coef[_STUDY] * row[_STUDY] + engine.coef[_ABSENCES] * row[_ABSENCES]
+            + engine.coef[_TUTORING] * row[_TUTORING]
+        )
+        return (base
+                + engine.coef[_TUTORING] * np.asarray(tutoring, dtype=np.float64)[:, None, None]
+                + engine.coef[_STUDY] * np.asarray(study_times, dtype=np.float64)[None, :, None]
+                + engine.coef[_ABSENCES] * np.asarray(absences, dtype=np.float64)[None, None, :])
+
+    # Otros modelos: una sola predicción por lote con todas las combinaciones
+    shape = (len(tutoring), len(study_times), len(absences))
+    grid = np.broadcast_to(row, shape + (len(FEATURES),)).copy()
+    grid[..., _TUTORING] = np.asarray(tutoring)[:, None, None]
+    grid[..., _STUDY] = np.asarray(study_times)[None, :, None]
+    grid[..., _ABSENCES] = np.asarray(absences)[None, None, :]
+    return np.asarray(engine.predict(grid.reshape(-1, len(FEATURES))), dtype=np.float64).reshape(shape)
+
+
+# Costo de llevar al estudiante a cada punto de la rejilla (inf si implica empeorar un hábito)
+def intervention_costs(row, study_times=STUDY_TIMES, absences=ABSENCES, tutoring=TUTORING,
+                       costs=INTERVENTION_COSTS):
+    extra_study = np.asarray(study_times, dtype=np.float64) - row[_STUDY]
+    fewer_absences = row[_ABSENCES] - np.asarray(absences, dtype=np.float64)
+    add_tutoring = np.asarray(tutoring, dtype=np.float64) - row[_TUTORING]
+
+    total = (costs['Tutoring'] * np.maximum(add_tutoring, 0)[:, None, None]
+             + costs['StudyTimeWeekly'] * np.maximum(extra_study, 0)[None, :, None]
+             + costs['Absences'] * np.maximum(fewer_absences, 0)[None, None, :])
+    worse = ((add_tutoring < 0)[:, None, None] | (extra_study < 0)[None, :, None]
+             | (fewer_absences < 0)[None, None, :])
+    return np.where(worse, np.inf, total)
+
+
+# Intervención más barata que saca al estudiante de su nivel de riesgo actual (None si no hay)
+def cheapest_intervention(row, gpa_grid, current_code, study_times=STUDY_TIMES, absences=ABSENCES,
+                          tutoring=TUTORING, costs=INTERVENTION_COSTS):
+    row = np.asarray(row, dtype=np.float64)
+    cost = intervention_costs(row, study_times, absences, tutoring, costs)
+    improves = risk_codes_batch(gpa_grid.ravel()).reshape(gpa_grid.shape) < current_code
+    cost = np.where(improves, cost, np.inf)
+    if not np.isfinite(cost).any():
+        return None
+
+    # A igual costo, preferir el mayor GPA
+    candidates = np.flatnonzero(cost.ravel() == cost.min())
+    best = candidates[np.argmax(gpa_grid.ravel()[candidates])]
+    t, s, a = np.unravel_index(best, gpa_grid.shape)
+    gpa = float(gpa_grid[t, s, a])
+    code = int(risk_codes_batch([gpa])[0])
+    return {
+        'Tutoring': int(tutoring[t]),
+        'StudyTimeWeekly': float(study_times[s]),
+        'Absences': int(absences[a]),
+        'gpa': gpa,
+        'risk_code': code,
+        'risk_level': RISK_LABELS[code],
+        'cost': float(cost[t, s, a]),
+    }
+
+
+# Índice más cercano de un valor en un eje de la rejilla
+def nearest_index(axis, value):
+    return int(np.abs(np.asarray(axis, dtype=np.float64) - value).argmin())
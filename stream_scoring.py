@@ -0,0 +1,218 @@
+"""Puntuación por bloques de archivos de cohorte más grandes que la memoria.
+
+Lee la entrada por bloques de tamaño fijo (CSV con ``pd.read_csv(chunksize=...)``, o
+Parquet / Arrow IPC mapeados en memoria con pyarrow), puntúa cada bloque con
+``score_cohort`` y escribe el resultado de forma incremental, así que la memoria depende
+del tamaño de bloque y no del tamaño del archivo. Con ``--jobs N`` los bloques se
+puntúan en N procesos y se escriben en el mismo orden de la entrada. La salida se escribe
+en un archivo temporal que reemplaza al destino solo si todo el archivo se puntuó.
+
+Uso:
+    python stream_scoring.py cohorte_distrito.csv cohorte_evaluada.csv
+    python stream_scoring.py cohorte.parquet evaluada.parquet --chunk-size 200000 --jobs 4
+"""
+import argparse
+import os
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from model_registry import REGISTRY_DIR, ModelManager
+from predictor_core import score_cohort
+
+
+PARQUET_EXTENSIONS = ('.parquet', '.pq')
+ARROW_EXTENSIONS = ('.arrow', '.feather', '.ipc')
+
+
+def _file_format(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension in PARQUET_EXTENSIONS:
+        return 'parquet'
+    if extension in ARROW_EXTENSIONS:
+        return 'arrow'
+    return 'csv'
+
+
+# Bloques de la entrada como DataFrames de a lo sumo chunk_size filas
+def iter_chunks(path, chunk_size=50000):
+    file_format = _file_format(path)
+    if file_format == 'csv':
+        yield from pd.read_csv(path, chunksize=chunk_size)
+        return
+
+    import pyarrow as pa
+
+    if file_format == 'parquet':
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path, memory_map=True)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+        return
+
+    # Arrow IPC: los record batches se leen sin copiar desde el archivo mapeado
+    with pa.memory_map(path, 'r') as source:
+        reader = pa.ipc.open_file(source)
+        for i in range(reader.num_record_batches):
+            batch = reader.get_batch(i)
+            for start in range(0, batch.num_rows, chunk_size):
+                yield batch.slice(start, chunk_size).to_pandas()
+
+
+# Escribe los bloques puntuados a medida que llegan (CSV o Parquet según la extensión)
+class ChunkWriter:
+    def __init__(self, path):
+        self.path = path
+        self.file_format = _file_format(path)
+        if self.file_format == 'arrow':
+            raise ValueError("La salida debe ser CSV o Parquet")
+        self.rows = 0
+        self._csv_file = None
+        self._parquet_writer = None
+
+    # Texto CSV de un bloque (con encabezado solo en el primero); lo pueden generar los procesos del pool
+    @staticmethod
+    def format_csv(df, first):
+        return df.to_csv(index=False, header=first)
+
+    # Escribir un bloque ya formateado con format_csv
+    def write_csv_text(self, text, rows):
+        if self._csv_file is None:
+            self._csv_file = open(self.path, 'w', encoding='utf-8', newline='')
+        self._csv_file.write(text)
+        self.rows += rows
+
+    def write(self, df):
+        if self.file_format == 'csv':
+            self.write_csv_text(self.format_csv(df, self.rows == 0), len(df))
+            return
+
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if self._parquet_writer is None:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+        else:
+            table = pa.Table.from_pandas(df, schema=self._parquet_writer.schema, preserve_index=False)
+        self._parquet_writer.write_table(table)
+        self.rows += len(df)
+
+    def close(self):
+        if self._csv_file is not None:
+            self._csv_file.close()
+            self._csv_file = None
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+# Modelo de cada proceso del pool (se envía una vez al crear el proceso, no por bloque)
+_worker_model = None
+
+
+def _init_worker(model):
+    global _worker_model
+    _worker_model = model
+
+
+# Puntuar un bloque en un proceso del pool; la salida CSV también se formatea ahí
+def _score_chunk(chunk, first_row, as_csv):
+    scored = score_cohort(chunk, _worker_model, first_row=first_row)
+    if as_csv:
+        return len(scored), ChunkWriter.format_csv(scored, first_row == 0)
+    return len(scored), scored
+
+
+def _numbered_chunks(input_path, chunk_size):
+    first_row = 0
+    for chunk in iter_chunks(input_path, chunk_size):
+        yield chunk, first_row
+        first_row += len(chunk)
+
+
+# Puntuar input_path y escribir en output_path; devuelve el número de filas escritas
+def _write_scored(input_path, writer, model, chunk_size, jobs, progress):
+    if jobs <= 1:
+        for chunk, first_row in _numbered_chunks(input_path, chunk_size):
+            writer.write(score_cohort(chunk, model, first_row=first_row))
+            if progress is not None:
+                progress(writer.rows)
+        return writer.rows
+
+    def write_result(future):
+        rows, result = future.result()
+        if as_csv:
+            writer.write_csv_text(result, rows)
+        else:
+            writer.write(result)
+        if progress is not None:
+            progress(writer.rows)
+
+    # Como mucho 2 bloques en vuelo por proceso: la memoria sigue acotada y el orden se conserva
+    as_csv = writer.file_format == 'csv'
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(model,)) as executor:
+        pending = deque()
+        for chunk, first_row in _numbered_chunks(input_path, chunk_size):
+            pending.append(executor.submit(_score_chunk, chunk, first_row, as_csv))
+            if len(pending) >= 2 * jobs:
+                write_result(pending.popleft())
+        while pending:
+            write_result(pending.popleft())
+    return writer.rows
+
+
+# Se escribe en un temporal junto al destino (misma extensión, mismo sistema de archivos) y
+# solo se reemplaza el destino si todo el archivo se puntuó; un error no deja salidas a medias
+def score_stream(input_path, output_path, model, chunk_size=50000, jobs=1, progress=None):
+    directory = os.path.dirname(os.path.abspath(output_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix=os.path.splitext(output_path)[1])
+    os.close(fd)
+    try:
+        with ChunkWriter(tmp_path) as writer:
+            rows = _write_scored(input_path, writer, model, chunk_size, jobs, progress)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Puntuación por bloques de cohortes grandes")
+    parser.add_argument('input', help="CSV, Parquet o Arrow IPC con las columnas de Student_performance_data.csv")
+    parser.add_argument('output', help="CSV o Parquet de salida")
+    parser.add_argument('--chunk-size', type=int, default=50000, help="Filas por bloque")
+    parser.add_argument('--jobs', type=int, default=1, help="Procesos para puntuar bloques en paralelo")
+    parser.add_argument('--registry', default=REGISTRY_DIR)
+    parser.add_argument('--model', default='WeightBestModel.pkl', help="Modelo a usar si no hay registro")
+    args = parser.parse_args()
+
+    model = ModelManager(registry_dir=args.registry, fallback_path=args.model).get()
+    if model is None:
+        raise SystemExit("No se pudo cargar el modelo")
+
+    start = time.perf_counter()
+    try:
+        rows = score_stream(args.input, args.output, model, args.chunk_size, args.jobs,
+                            progress=lambda rows: print(f"\r{rows:,} filas puntuadas", end='', flush=True))
+    except ValueError as e:
+        raise SystemExit(f"\n❌ El archivo no tiene el formato esperado: {str(e)}")
+    elapsed = time.perf_counter() - start
+    print(f"\n✅ {rows:,} filas en {elapsed:.1f} s ({rows / elapsed:,.0f} filas/s) - versión {model.version}")
+
+
+if __name__ == "__main__":
+    main()
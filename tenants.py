@@ -0,0 +1,156 @@
+"""Despliegue multi-campus: rutas por campus y pool de modelos acotado en memoria.
+
+Cada campus tiene su propio directorio con registro de modelos y registros:
+
+    tenants/
+        norte/
+            WeightBestModel.pkl      <- opcional; si falta se usa el modelo compartido
+            models/                  <- registro de versiones del campus (model_registry)
+            logs/predictions.db  logs/predictions.jsonl  logs/history/
+
+El campus por defecto (sin nombre) usa las rutas de siempre en la raíz del proyecto.
+Los modelos se cargan al primer uso de cada campus y el pool descarta el de uso menos
+reciente cuando se supera el número máximo de modelos o el presupuesto de memoria.
+"""
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from metrics import STAGE_SECONDS
+from model_registry import REGISTRY_DIR, ModelManager
+
+
+TENANTS_DIR = 'tenants'
+SHARED_MODEL_PATH = 'WeightBestModel.pkl'
+TENANT_NAME = re.compile(r'^[a-z0-9][a-z0-9_-]{0,63}$')
+
+logger = logging.getLogger(__name__)
+
+
+# Rutas de un campus; name=None es el despliegue de un solo campus
+class Tenant:
+    def __init__(self, name=None, tenants_dir=TENANTS_DIR):
+        if name is not None and not TENANT_NAME.match(name):
+            raise ValueError(f"Nombre de campus inválido: {name!r}")
+        self.name = name
+        self.root = '.' if name is None else os.path.join(tenants_dir, name)
+        self.registry_dir = os.path.join(self.root, REGISTRY_DIR)
+        own_model = os.path.join(self.root, SHARED_MODEL_PATH)
+        self.model_path = own_model if name is not None and os.path.exists(own_model) else SHARED_MODEL_PATH
+        self.logs_dir = os.path.join(self.root, 'logs')
+        self.db_path = os.path.join(self.logs_dir, 'predictions.db')
+        self.event_log_path = os.path.join(self.logs_dir, 'predictions.jsonl')
+        self.history_dir = os.path.join(self.logs_dir, 'history')
+
+    @property
+    def label(self):
+        return tenant_label(self.name)
+
+
+# Nombre para mostrar y para las etiquetas de métricas (sin construir el Tenant)
+def tenant_label(name):
+    return name or 'principal'
+
+
+# Campus configurados (subdirectorios de tenants/ con nombre válido)
+def list_tenants(tenants_dir=TENANTS_DIR):
+    if not os.path.isdir(tenants_dir):
+        return []
+    return sorted(name for name in os.listdir(tenants_dir)
+                  if TENANT_NAME.match(name) and os.path.isdir(os.path.join(tenants_dir, name)))
+
+
+def _model_bytes(manager):
+    # Tamaño del .pkl como aproximación de la memoria que ocupa el modelo
+    try:
+        return os.path.getsize(manager.artifact_path)
+    except (OSError, TypeError):
+        return 0
+
+
+# Modelos por campus con desalojo LRU; un solo hilo vigilante recarga los que están en memoria
+class ModelPool:
+    def __init__(self, max_models=16, max_bytes=512 * 1024 * 1024, tenants_dir=TENANTS_DIR):
+        self.max_models = max_models
+        self.max_bytes = max_bytes
+        self.tenants_dir = tenants_dir
+        self.managers = OrderedDict()
+        self.sizes = {}
+        self.loads = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher = None
+
+    def manager(self, tenant):
+        key = tenant.name
+        with self._lock:
+            manager = self.managers.get(key)
+            if manager is not None:
+                self.managers.move_to_end(key)
+                return manager
+
+        # Cargar fuera del lock para no bloquear a los demás campus
+        with STAGE_SECONDS.time('model_load'):
+            manager = ModelManager(registry_dir=tenant.registry_dir, fallback_path=tenant.model_path)
+        size = _model_bytes(manager)
+
+        with self._lock:
+            if key in self.managers:
+                self.managers.move_to_end(key)
+                return self.managers[key]
+            self.managers[key] = manager
+            self.sizes[key] = size
+            self.loads += 1
+            self._evict()
+        logger.info(f"Modelo del campus {tenant.label} cargado en el pool ({manager.version})")
+        return manager
+
+    # Modelo activo del campus (cada petición debe tomarlo una sola vez)
+    def get(self, tenant):
+        return self.manager(tenant).get()
+
+    def _evict(self):
+        # El recién cargado siempre se conserva aunque por sí solo supere el presupuesto
+        while len(self.managers) > 1 and (len(self.managers) > self.max_models
+                                          or sum(self.sizes.values()) > self.max_bytes):
+            key, _ = self.managers.popitem(last=False)
+            self.sizes.pop(key, None)
+            self.evictions += 1
+            logger.info(f"Modelo del campus {key or 'principal'} descartado del pool")
+
+    def stats(self):
+        with self._lock:
+            return {
+                'resident': [key or 'principal' for key in self.managers],
+                'bytes': sum(self.sizes.values()),
+                'loads': self.loads,
+                'evictions': self.evictions,
+            }
+
+    def start_watcher(self, interval=5.0):
+        if self._watcher is not None:
+            return
+        self._watcher = threading.Thread(target=self._watch, args=(interval,), name='model-pool-watcher', daemon=True)
+        self._watcher.start()
+
+    def stop_watcher(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def _watch(self, interval):
+        while not self._stop.wait(interval):
+            with self._lock:
+                resident = list(self.managers.items())
+            for key, manager in resident:
+                start = time.perf_counter()
+                if manager.reload():
+                    STAGE_SECONDS.observe(time.perf_counter() - start, 'model_load')
+                    with self._lock:
+                        if key in self.sizes:
+                            self.sizes[key] = _model_bytes(manager)
@@ -0,0 +1,275 @@
+"""Entrenamiento y comparación de modelos (versión en script de Training.ipynb).
+
+Entrena los 11 regresores del notebook en paralelo (la búsqueda de hiperparámetros y la
+validación cruzada se reparten en tareas por modelo, parámetros y fold), mide
+exactitud (R², RMSE, MAE, validación cruzada) y latencia de inferencia (una fila y
+por lote), guarda la tabla comparativa y el mejor modelo.
+
+Uso:
+    python train_models.py --jobs 4
+    python train_models.py --models LinearRegression Ridge --results /tmp/resultados.csv
+"""
+import argparse
+import os
+import time
+import warnings
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import ElasticNet, Lasso, LinearRegression, Ridge
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.model_selection import KFold, ParameterGrid, train_test_split
+from sklearn.neighbors import KNeighborsRegressor
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVR
+from sklearn.tree import DecisionTreeRegressor
+
+from model_registry import REGISTRY_DIR, publish_model
+from predictor_core import FEATURES, InferenceEngine
+
+
+# Modelos opcionales: si la librería no está instalada el modelo se omite
+def _optional_models():
+    models = {}
+    try:
+        from xgboost import XGBRegressor
+        models['XGBoost'] = lambda: Pipeline([('model', XGBRegressor(random_state=42, verbosity=0, n_jobs=1))])
+    except ImportError:
+        pass
+    try:
+        from lightgbm import LGBMRegressor
+        models['LightGBM'] = lambda: Pipeline([('model', LGBMRegressor(random_state=42, verbose=-1, n_jobs=1))])
+    except ImportError:
+        pass
+    return models
+
+
+# Mismos modelos que Training.ipynb (se construyen dentro de cada proceso)
+MODELS = {
+    'LinearRegression': lambda: Pipeline([('scaler', StandardScaler()), ('model', LinearRegression())]),
+    'Ridge': lambda: Pipeline([('scaler', StandardScaler()), ('model', Ridge(random_state=42))]),
+    'Lasso': lambda: Pipeline([('scaler', StandardScaler()), ('model', Lasso(random_state=42))]),
+    'ElasticNet': lambda: Pipeline([('scaler', StandardScaler()), ('model', ElasticNet(random_state=42))]),
+    'SVR': lambda: Pipeline([('scaler', StandardScaler()), ('model', SVR())]),
+    'KNN': lambda: Pipeline([('scaler', StandardScaler()), ('model', KNeighborsRegressor())]),
+    'DecisionTree': lambda: Pipeline([('scaler', StandardScaler()), ('model', DecisionTreeRegressor(random_state=42))]),
+    'RandomForest': lambda: Pipeline([('model', RandomForestRegressor(random_state=42, n_jobs=1))]),
+    'GradientBoosting': lambda: Pipeline([('model', GradientBoostingRegressor(random_state=42))]),
+}
+MODEL_NAMES = list(MODELS) + ['XGBoost', 'LightGBM']
+
+PARAM_GRIDS = {
+    'Ridge': {'model__alpha': [0.001, 0.01, 0.1, 1, 10, 100]},
+    'Lasso': {'model__alpha': [0.001, 0.01, 0.1, 1, 10, 100]},
+    'ElasticNet': {'model__alpha': [0.001, 0.01, 0.1, 1, 10],
+                   'model__l1_ratio': [0.1, 0.3, 0.5, 0.7, 0.9]},
+    'SVR': {'model__C': [0.1, 1, 10],
+            'model__gamma': ['scale', 'auto'],
+            'model__kernel': ['linear', 'rbf']},
+    'KNN': {'model__n_neighbors': [3, 5, 7, 9],
+            'model__weights': ['uniform', 'distance']},
+    'DecisionTree': {'model__max_depth': [None, 5, 10, 15],
+                     'model__min_samples_split': [2, 5, 10]},
+    'RandomForest': {'model__n_estimators': [50, 100],
+                     'model__max_depth': [None, 10, 15]},
+    'GradientBoosting': {'model__n_estimators': [50, 100],
+                         'model__learning_rate': [0.01, 0.1],
+                         'model__max_depth': [3, 5]},
+    'XGBoost': {'model__n_estimators': [50, 100],
+                'model__learning_rate': [0.01, 0.1],
+                'model__max_depth': [3, 5]},
+    'LightGBM': {'model__n_estimators': [50, 100],
+                 'model__learning_rate': [0.01, 0.1],
+                 'model__max_depth': [3, 5]},
+}
+
+
+def load_data(path):
+    df = pd.read_csv(path)
+    X = df[FEATURES]
+    y = df['GPA']
+    return train_test_split(X, y, test_size=0.2, random_state=42)
+
+
+# Latencia de inferencia tal como la usa la app (InferenceEngine)
+def measure_latency(model, X_test, single_repeat=200, batch_rows=10000, batch_repeat=5):
+    engine = InferenceEngine(model)
+    rows = X_test.to_numpy(dtype=np.float64).tolist()
+
+    engine.predict_one(rows[0])
+    start = time.perf_counter()
+    for i in range(single_repeat):
+        engine.predict_one(rows[i % len(rows)])
+    single_us = (time.perf_counter() - start) / single_repeat * 1e6
+
+    batch = pd.concat([X_test] * (batch_rows // len(X_test) + 1), ignore_index=True).iloc[:batch_rows]
+    engine.predict(batch)
+    start = time.perf_counter()
+    for _ in range(batch_repeat):
+        engine.predict(batch)
+    batch_s = (time.perf_counter() - start) / batch_repeat
+
+    return {
+        'Closed_Form': engine.is_linear,
+        'Single_Row_us': single_us,
+        'Batch_Rows_per_s': batch_rows / batch_s,
+    }
+
+
+# Datos de entrenamiento por proceso: las tareas del pool los leen una sola vez
+_DATA = {}
+
+
+def _cached_data(path):
+    if path not in _DATA:
+        _DATA[path] = load_data(path)
+    return _DATA[path]
+
+
+def build_model(name, params):
+    factories = {**MODELS, **_optional_models()}
+    if name not in factories:
+        raise ImportError(f"librería no instalada para {name}")
+    return factories[name]().set_params(**params)
+
+
+# Candidatos de la búsqueda (en el orden de GridSearchCV; un solo candidato sin rejilla)
+def candidates_for(name):
+    return list(ParameterGrid(PARAM_GRIDS[name])) if name in PARAM_GRIDS else [{}]
+
+
+# Ajustar un candidato en un fold de la validación cruzada (una tarea del pool). Los folds
+# son los de GridSearchCV/cross_val_score con cv entero: KFold sin barajar
+def fit_fold(name, params, data_path, cv, fold):
+    warnings.filterwarnings('ignore')
+    X_train, _, y_train, _ = _cached_data(data_path)
+    train_idx, val_idx = list(KFold(n_splits=cv).split(X_train))[fold]
+    model = build_model(name, params)
+    start = time.perf_counter()
+    model.fit(X_train.iloc[train_idx], y_train.iloc[train_idx])
+    fit_s = time.perf_counter() - start
+    return r2_score(y_train.iloc[val_idx], model.predict(X_train.iloc[val_idx])), fit_s
+
+
+# Reentrenar el mejor candidato con todo el entrenamiento y evaluarlo (una tarea por modelo).
+# Los puntajes de validación cruzada son los folds del mejor candidato
+def train_and_evaluate(name, params, data_path, cv_scores, search_fit_s):
+    warnings.filterwarnings('ignore')
+    X_train, X_test, y_train, y_test = _cached_data(data_path)
+    model = build_model(name, params)
+
+    start = time.perf_counter()
+    best_model = model.fit(X_train, y_train)
+    fit_s = search_fit_s + time.perf_counter() - start
+
+    y_pred_train = best_model.predict(X_train)
+    y_pred_test = best_model.predict(X_test)
+    train_r2 = r2_score(y_train, y_pred_train)
+    test_r2 = r2_score(y_test, y_pred_test)
+
+    result = {
+        'Train_R2': train_r2,
+        'Test_R2': test_r2,
+        'Test_RMSE': np.sqrt(mean_squared_error(y_test, y_pred_test)),
+        'Test_MAE': mean_absolute_error(y_test, y_pred_test),
+        'CV_Mean_R2': cv_scores.mean(),
+        'CV_Std_R2': cv_scores.std(),
+        'Overfitting': train_r2 - test_r2,
+        'Fit_s': fit_s,
+    }
+    result.update(measure_latency(best_model, X_test))
+    result['R2_per_us'] = test_r2 / result['Single_Row_us']
+    return name, result, best_model
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Entrena y compara los modelos de Training.ipynb")
+    parser.add_argument('--data', default='Student_performance_data.csv')
+    parser.add_argument('--models', nargs='+', choices=MODEL_NAMES, default=MODEL_NAMES)
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help="Procesos en paralelo")
+    parser.add_argument('--cv', type=int, default=5)
+    parser.add_argument('--results', default='resultados_modelos.csv')
+    parser.add_argument('--output-model', default='WeightBestModel.pkl')
+    parser.add_argument('--select-by', choices=['Test_R2', 'R2_per_us'], default='Test_R2',
+                        help="Métrica para elegir el modelo que se guarda")
+    parser.add_argument('--publish', action='store_true',
+                        help=f"Publicar el modelo guardado como nueva versión activa en {REGISTRY_DIR}/")
+    args = parser.parse_args()
+
+    results, best_models = {}, {}
+    candidates = {name: candidates_for(name) for name in args.models}
+    scores = {name: np.zeros((len(candidates[name]), args.cv)) for name in args.models}
+    search_fit_s = dict.fromkeys(args.models, 0.0)
+    remaining = {name: len(candidates[name]) * args.cv for name in args.models}
+    print(f"Entrenando {len(args.models)} modelos ({sum(remaining.values())} ajustes de validación "
+          f"cruzada) con {args.jobs} procesos...")
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        # Una tarea por (modelo, parámetros, fold): ningún modelo lento deja procesos ociosos
+        pending = {}
+        for name in args.models:
+            for index, params in enumerate(candidates[name]):
+                for fold in range(args.cv):
+                    future = executor.submit(fit_fold, name, params, args.data, args.cv, fold)
+                    pending[future] = (name, index, fold)
+
+        failed = set()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, index, fold = pending.pop(future)
+                if name in failed:
+                    continue
+                try:
+                    outcome = future.result()
+                except Exception as e:
+                    failed.add(name)
+                    for other, (other_name, _, _) in pending.items():
+                        if other_name == name:
+                            other.cancel()
+                    print(f"❌ Error en {name}: {str(e)}")
+                    continue
+
+                # Evaluación final del modelo
+                if index is None:
+                    _, result, model = outcome
+                    results[name] = result
+                    best_models[name] = model
+                    print(f"✅ {name} completado - Test R²: {result['Test_R2']:.4f}, "
+                          f"1 fila: {result['Single_Row_us']:.1f} µs")
+                    continue
+
+                scores[name][index, fold], fit_s = outcome
+                search_fit_s[name] += fit_s
+                remaining[name] -= 1
+                if remaining[name] == 0:
+                    # Mejor media de los folds; en empate gana el primer candidato, como en GridSearchCV
+                    best = int(np.argmax(scores[name].mean(axis=1)))
+                    fit_s = search_fit_s[name] if name in PARAM_GRIDS else 0.0
+                    future = executor.submit(train_and_evaluate, name, candidates[name][best], args.data,
+                                             scores[name][best], fit_s)
+                    pending[future] = (name, None, None)
+
+    if not results:
+        raise SystemExit("Ningún modelo se entrenó correctamente")
+
+    results_df = pd.DataFrame.from_dict(results, orient='index').sort_values('Test_R2', ascending=False)
+    print("\n📊 TABLA DE RESULTADOS:")
+    print(results_df.round(4).to_string())
+    results_df.to_csv(args.results, encoding='utf-8')
+    print(f"\n💾 Resultados guardados en '{args.results}'")
+
+    best_name = results_df[args.select_by].idxmax()
+    joblib.dump(best_models[best_name], args.output_model)
+    print(f"🎯 Mejor modelo ({args.select_by}): {best_name} - guardado en '{args.output_model}'")
+
+    if args.publish:
+        version = publish_model(args.output_model)
+        print(f"🚀 Versión publicada en el registro: {version}")
+
+
+if __name__ == "__main__":
+    main()